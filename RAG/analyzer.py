@@ -1,13 +1,13 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-import requests
 import os
 from dotenv import load_dotenv
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_openai import ChatOpenAI
 from langchain_core.output_parsers import StrOutputParser
-from langchain_core.runnables import RunnablePassthrough
-from collections import defaultdict
+from memory import create_memory_store, memory_block, MemorySummarizer
+from sessions import create_session_store, new_session_id
+from document_cache import DocumentCache
 
 # Load environment variables from .env if present
 load_dotenv()
@@ -29,8 +29,17 @@ llm = ChatOpenAI(
     model_name=MODEL_NAME,
 )
 
-# Simple in-memory memory store
-memory_store = defaultdict(list)
+# Previous interactions per user, capped per user and evicted when idle
+memory_store = create_memory_store("analyzer")
+
+# Folds older interactions into a running summary, off the request path
+memory_summarizer = MemorySummarizer(memory_store, ChatOpenAI(temperature=0, model_name=MODEL_NAME))
+
+# Saved queries by session id, handed from POST to GET /api/analyze
+sessions = create_session_store("analyzer")
+
+# The parsed document from the backend, fetched again only when it changes
+document_cache = DocumentCache()
 
 # Define the legal document analyzer prompt
 legal_analyzer_prompt = """You are an expert legal document analyzer specializing in Indian law. Your role is to analyze legal documents and provide precise insights based on user queries.
@@ -70,13 +79,13 @@ def get_document_and_memory(query_info):
     query = query_info["question"]
     user_id = query_info["user_id"]
     
-    # Get document content
-    document = get_parsed_text()
+    # The document the route already fetched for this request
+    document = query_info.get("document") or get_parsed_text()
     if not document:
         document = "No document available."
     
-    # Get relevant memory
-    memories = memory_store[user_id]
+    # Get the running summary and recent interactions
+    memories = memory_block(*memory_store.history(user_id))
     
     return {
         "document": document,
@@ -87,19 +96,11 @@ def get_document_and_memory(query_info):
 def save_interaction(user_id: str, user_input: str, assistant_response: str):
     """Save the interaction to memory"""
     interaction = f"User asked: {user_input}\nAssistant answered: {assistant_response}"
-    memory_store[user_id].append(interaction)
-    # Keep only last 10 interactions
-    memory_store[user_id] = memory_store[user_id][-10:]
+    memory_store.append(user_id, interaction)
+    memory_summarizer.maybe_compact(user_id)
 
 def get_parsed_text():
-    try:
-        response = requests.get('http://localhost:8000/api/plain-text')
-        if response.status_code == 200:
-            return response.text.strip()
-        else:
-            return None
-    except Exception as e:
-        return None
+    return document_cache.get()
 
 # Create the chain
 analyzer_chain = (
@@ -109,43 +110,40 @@ analyzer_chain = (
     | StrOutputParser()
 )
 
-# Global variables to store the latest query and user details
-latest_query = ""
-latest_user_details = {}
-
 @app.route('/api/analyze', methods=['POST'])
 def analyze():
-    global latest_query, latest_user_details
-    
     data = request.get_json()
     if not data or 'query' not in data:
         return jsonify({"error": "No query provided in request body"}), 400
     
-    latest_query = data['query']
-    latest_user_details = data.get('userDetails', {'id': 'default_user'})
+    # GET /api/analyze?session_id=... repeats this analysis
+    session = {"session_id": new_session_id(), "query": data['query'], "user_details": data.get('userDetails', {'id': 'default_user'})}
+    sessions.put(session["session_id"], session)
     
     try:
         query_info = {
-            "question": latest_query,
-            "user_id": latest_user_details.get('id', 'default_user')
+            "question": session["query"],
+            "user_id": session["user_details"].get('id', 'default_user')
         }
         
-        document = get_parsed_text()
-        if not document:
+        # Fetched once here and handed to the chain
+        query_info["document"] = get_parsed_text()
+        if not query_info["document"]:
             return jsonify({"error": "No parsed document available"}), 404
         
         response = analyzer_chain.invoke(query_info)
         
         # Save the interaction
         save_interaction(
-            latest_user_details.get('id', 'default_user'),
-            latest_query,
+            query_info["user_id"],
+            session["query"],
             response
         )
         
         return jsonify({
             "status": "success",
-            "query": latest_query,
+            "session_id": session["session_id"],
+            "query": session["query"],
             "document_available": True,
             "langchain_response": response
         })
@@ -153,23 +151,22 @@ def analyze():
         return jsonify({"error": str(e), "status": "error"}), 500
 
 @app.route('/api/analyze', methods=['GET'])
-def get_latest_analysis():
-    global latest_query, latest_user_details
-    
-    if not latest_query:
-        # If no query has been made yet, create a default summary request
-        query_info = {
-            "question": "Summarize this document",
-            "user_id": "default_user"
-        }
-    else:
-        query_info = {
-            "question": latest_query,
-            "user_id": latest_user_details.get('id', 'default_user')
-        }
+def get_session_analysis():
+    # The query saved by POST /api/analyze under ?session_id=
+    session_id = request.args.get("session_id") or request.headers.get("X-Session-Id")
+    if not session_id:
+        return jsonify({"error": "session_id is required; it is returned by POST /api/analyze", "status": "error"}), 400
+    session = sessions.get(session_id)
+    if session is None:
+        return jsonify({"error": "Unknown or expired session", "status": "error"}), 404
+    query_info = {
+        "question": session["query"],
+        "user_id": session["user_details"].get('id', 'default_user')
+    }
     
-    document = get_parsed_text()
-    if not document:
+    # Fetched once here and handed to the chain
+    query_info["document"] = get_parsed_text()
+    if not query_info["document"]:
         return jsonify({"error": "No parsed document available"}), 404
     
     try:
@@ -177,6 +174,7 @@ def get_latest_analysis():
         
         return jsonify({
             "status": "success",
+            "session_id": session["session_id"],
             "query": query_info["question"],
             "document_available": True,
             "langchain_response": response
@@ -184,5 +182,15 @@ def get_latest_analysis():
     except Exception as e:
         return jsonify({"error": str(e), "status": "error"}), 500
 
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    """Document cache, memory and session counters of this process"""
+    return jsonify({
+        "document_cache": document_cache.stats(),
+        "memory": memory_store.stats(),
+        "memory_summarizer": memory_summarizer.stats(),
+        "sessions": sessions.stats()
+    })
+
 if __name__ == '__main__':
     app.run(port=9001, debug=True) 
\ No newline at end of file
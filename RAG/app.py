@@ -1,14 +1,19 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
+import json
 import os
+import time
 from dotenv import load_dotenv
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.prompts import ChatPromptTemplate
 from langchain_openai import ChatOpenAI
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import RunnablePassthrough
-from typing import List, Dict
-from vector_store import get_vectorstore
-from collections import defaultdict
+from typing import List
+from vector_store import get_vectorstore, get_embeddings, get_retriever
+from semantic_cache import SemanticCache, document_ids
+from context_packing import pack_prompt
+from memory import create_memory_store, recall_memory, MemorySummarizer
+from sessions import create_session_store, new_session_id
 
 # Load environment variables
 load_dotenv()
@@ -17,10 +22,9 @@ load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 MODEL_NAME = os.getenv("MODEL_NAME")
 TEMPERATURE = float(os.getenv("TEMPERATURE", "0.7"))
-QDRANT_URL = os.getenv("QDRANT_URL")
-QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
 
-if not all([OPENAI_API_KEY, MODEL_NAME, QDRANT_URL, QDRANT_API_KEY]):
+# The Qdrant settings are checked by vector_store, and only for that backend
+if not all([OPENAI_API_KEY, MODEL_NAME]):
     raise ValueError("Required environment variables are not set")
 
 # Set API keys
@@ -32,9 +36,19 @@ CORS(app)
 # Initialize components
 llm = ChatOpenAI(temperature=TEMPERATURE, model_name=MODEL_NAME)
 vectorstore = get_vectorstore()
+retriever = get_retriever()
 
-# Simple in-memory memory store
-memory_store = defaultdict(list)
+# Previous interactions per user, capped per user and evicted when idle
+memory_store = create_memory_store("advisor")
+
+# Folds older interactions into a running summary, off the request path
+memory_summarizer = MemorySummarizer(memory_store, ChatOpenAI(temperature=0, model_name=MODEL_NAME))
+
+# Saved queries by session id, handed from /api/feed-input to the processing endpoints
+sessions = create_session_store("advisor")
+
+# Answers reused for near-identical questions about the same retrieved cases
+semantic_cache = SemanticCache()
 
 # Define the legal advisor prompt
 legal_advisor_prompt = """You are an authoritative legal advisor with expertise in Indian Supreme Court jurisprudence. Your role is to provide definitive, precise guidance based on Supreme Court precedents.
@@ -74,118 +88,272 @@ Query: {question}"""
 # Create prompt template
 prompt_template = ChatPromptTemplate.from_template(legal_advisor_prompt)
 
-def format_docs(docs):
-    """Format documents from retriever into a single string"""
-    return "\n\n".join(doc.page_content for doc in docs)
-
 def format_memory(memories):
     """Format memory into a single string"""
     if not memories:
         return "No relevant previous interactions."
     return "\n\n".join(memories)
 
-def retrieve_context_and_memory(query_info):
-    """Retrieve both documents and memory"""
-    query = query_info["question"]
-    user_id = query_info["user_id"]
-    
-    # Get relevant documents from retriever
-    docs = vectorstore.similarity_search(query)
-    
-    # Get relevant memory
-    memories = memory_store[user_id]
-    
-    return {
-        "context": format_docs(docs),
-        "memory": format_memory(memories),
-        "question": query
-    }
-
-def save_interaction(user_id: str, user_input: str, assistant_response: str):
-    """Save the interaction to memory"""
+def timed(name: str, step):
+    """Wrap a chain step so its duration in ms is added to the request's timings dict"""
+    def run(query_info):
+        start = time.perf_counter()
+        result = step(query_info)
+        timings = query_info.get("timings")
+        if timings is not None:
+            timings[name] = round((time.perf_counter() - start) * 1000, 1)
+        return result
+    return run
+
+def embed_question(query_info):
+    """Embed the question once; retrieval and the semantic cache share the vector"""
+    return get_embeddings().embed_query(query_info["question"])
+
+def retrieve_documents(query_info):
+    """The single retrieval pass of a request: vector and keyword search, fused"""
+    return retriever.search(query_info["question"], query_info["embedding"])
+
+def lookup_cached_answer(query_info):
+    """Answer of an earlier, near-identical question about the same cases, unless bypassed"""
+    if not query_info.get("use_cache", True):
+        return None
+    return semantic_cache.get(query_info["embedding"], document_ids(query_info["docs"]))
+
+def remember_answer(query_info, answer: str):
+    # An answer drafted with earlier interactions in the prompt can repeat
+    # them, so only answers to a user's first question are shared
+    if memory_store.history(query_info["user_id"]) == ("", []):
+        semantic_cache.put(query_info["embedding"], document_ids(query_info["docs"]), answer)
+
+def generate_answer(query_info):
+    """The cached answer if there is one, otherwise a new one from the LLM"""
+    if query_info["cached_answer"] is not None:
+        return query_info["cached_answer"]
+    answer = answer_chain.invoke(query_info)
+    remember_answer(query_info, answer)
+    return answer
+
+def pack_context(query_info):
+    """Retrieved chunks and the user's summary and relevant interactions, cut to the prompt token budget"""
+    summary, turns, vectors, archive = memory_store.history_with_embeddings(query_info["user_id"])
+    memories = recall_memory(summary, turns, vectors, query_info["embedding"], archive)
+    return pack_prompt(query_info["docs"], memories, query_info["question"], legal_advisor_prompt)
+
+def save_interaction(user_id: str, user_input: str, assistant_response: str, embedding: List[float] = None):
+    """Save the interaction to memory, with the question's embedding for later recall"""
     interaction = f"User asked: {user_input}\nAssistant answered: {assistant_response}"
-    memory_store[user_id].append(interaction)
-    # Keep only last 10 interactions
-    memory_store[user_id] = memory_store[user_id][-10:]
-
-# Create the RAG chain
-rag_chain = (
-    retrieve_context_and_memory
-    | prompt_template
+    memory_store.append(user_id, interaction, embedding)
+    memory_summarizer.maybe_compact(user_id)
+
+# Answer from already retrieved context and memory; the streaming endpoint
+# uses it directly so it can send the chunks before the first token
+answer_chain = (
+    prompt_template
     | llm
     | StrOutputParser()
 )
 
-# Global variable to store the latest query and user details
-latest_query = ""
-latest_user_details = {}
+# Create the RAG chain. It takes {"question", "user_id"} plus optional
+# "use_cache" and "timings" entries and returns the input with "docs"
+# (retrieved once and used both for the prompt and by the caller),
+# "packed" (the prompt's context and memory with their token_usage),
+# "cached_answer" (None on a semantic cache miss) and "answer" added
+rag_chain_with_sources = (
+    RunnablePassthrough.assign(embedding=timed("embedding_ms", embed_question))
+    | RunnablePassthrough.assign(docs=timed("retrieval_ms", retrieve_documents))
+    | RunnablePassthrough.assign(packed=timed("packing_ms", pack_context))
+    | RunnablePassthrough.assign(
+        context=lambda query_info: query_info["packed"]["context"],
+        memory=lambda query_info: format_memory(query_info["packed"]["memory"]),
+        cached_answer=lookup_cached_answer
+    )
+    | RunnablePassthrough.assign(answer=timed("generation_ms", generate_answer))
+)
+
+# Same chain, returning only the answer
+rag_chain = rag_chain_with_sources | (lambda result: result["answer"])
+
+def sse_event(event: str, data) -> str:
+    """Format one Server-Sent Event carrying a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def use_cache_requested() -> bool:
+    """False when the request asks to skip the semantic cache with ?use_cache=false"""
+    return request.args.get("use_cache", "true").lower() not in ("false", "0", "no")
+
+def load_session():
+    """The saved query named by ?session_id= (or an X-Session-Id header), or
+    None with an error message and status: 400 without an id, 404 for an
+    unknown or expired one"""
+    session_id = request.args.get("session_id") or request.headers.get("X-Session-Id")
+    if not session_id:
+        return None, "session_id is required; it is returned by /api/feed-input", 400
+    session = sessions.get(session_id)
+    if session is None:
+        return None, "Unknown or expired session", 404
+    return session, None, None
 
 @app.route('/api/process-backend', methods=['GET'])
 def process_backend_data():
-    global latest_query, latest_user_details
-    if not latest_query:
-        return jsonify({"error": "No query has been saved yet", "status": "error"}), 404
+    session, error, status = load_session()
+    if session is None:
+        return jsonify({"error": error, "status": "error"}), status
+    query = session["query"]
+    user_details = session["user_details"]
 
     try:
-        # Retrieve both the docs and the formatted context
-        query_info = {
-            "question": latest_query,
-            "user_id": latest_user_details.get('id', 'default_user')
-        }
-        docs = vectorstore.similarity_search(query_info["question"])
-        formatted_context = format_docs(docs)
-        response = rag_chain.invoke(query_info)
+        # One retrieval pass feeds the prompt and the returned chunks
+        start = time.perf_counter()
+        timings = {}
+        result = rag_chain_with_sources.invoke({
+            "question": query,
+            "user_id": user_details.get('id', 'default_user'),
+            "use_cache": use_cache_requested(),
+            "timings": timings
+        })
+        docs = result["docs"]
+        response = result["answer"]
 
         # Save the interaction
         save_interaction(
-            latest_user_details.get('id', 'default_user'),
-            latest_query,
-            response
+            user_details.get('id', 'default_user'),
+            query,
+            response,
+            result["embedding"]
         )
 
         # Prepare retrieved chunks for frontend (raw text)
         retrieved_chunks = [doc.page_content for doc in docs]
+        timings["total_ms"] = round((time.perf_counter() - start) * 1000, 1)
 
         return jsonify({
             "status": "success",
-            "saved_query": latest_query,
-            "user_details": latest_user_details,
+            "session_id": session["session_id"],
+            "saved_query": query,
+            "user_details": user_details,
             "langchain_response": response,
-            "retrieved_chunks": retrieved_chunks
+            "retrieved_chunks": retrieved_chunks,
+            "cached": result["cached_answer"] is not None,
+            "token_usage": result["packed"]["token_usage"],
+            "timings": timings
         })
     except Exception as e:
         return jsonify({"error": str(e), "status": "error"}), 500
 
+@app.route('/api/process-backend/stream', methods=['GET'])
+def stream_backend_data():
+    """Same as /api/process-backend, sent as Server-Sent Events.
+
+    A "chunks" event with the retrieved chunks comes first, then one "token"
+    event per piece of the answer as the LLM produces it, then "done" with the
+    full answer (or "error"). An answer from the semantic cache arrives as a
+    single "token" event. The interaction is saved to memory only once the
+    answer is complete.
+    """
+    session, error, status = load_session()
+    if session is None:
+        return jsonify({"error": error, "status": "error"}), status
+
+    # Read everything from the request now; the generator runs after this function has returned
+    query = session["query"]
+    user_details = session["user_details"]
+    user_id = user_details.get('id', 'default_user')
+    use_cache = use_cache_requested()
+
+    def events():
+        try:
+            start = time.perf_counter()
+            query_info = {"question": query, "user_id": user_id, "use_cache": use_cache, "timings": {}}
+            query_info["embedding"] = timed("embedding_ms", embed_question)(query_info)
+            query_info["docs"] = docs = timed("retrieval_ms", retrieve_documents)(query_info)
+            yield sse_event("chunks", {
+                "session_id": session["session_id"],
+                "saved_query": query,
+                "user_details": user_details,
+                "retrieved_chunks": [doc.page_content for doc in docs]
+            })
+
+            packed = timed("packing_ms", pack_context)(query_info)
+            cached_answer = lookup_cached_answer(query_info)
+            tokens = []
+            generation_start = time.perf_counter()
+            answer_tokens = [cached_answer] if cached_answer is not None else answer_chain.stream({
+                "context": packed["context"],
+                "memory": format_memory(packed["memory"]),
+                "question": query
+            })
+            for token in answer_tokens:
+                if not tokens:
+                    query_info["timings"]["first_token_ms"] = round((time.perf_counter() - start) * 1000, 1)
+                tokens.append(token)
+                yield sse_event("token", {"token": token})
+            response = "".join(tokens)
+            query_info["timings"]["generation_ms"] = round((time.perf_counter() - generation_start) * 1000, 1)
+            query_info["timings"]["total_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+            # Not reached if the client disconnects mid-stream
+            if cached_answer is None:
+                remember_answer(query_info, response)
+            save_interaction(user_id, query, response, query_info["embedding"])
+            yield sse_event("done", {
+                "status": "success",
+                "langchain_response": response,
+                "cached": cached_answer is not None,
+                "token_usage": packed["token_usage"],
+                "timings": query_info["timings"]
+            })
+        except Exception as e:
+            yield sse_event("error", {"error": str(e), "status": "error"})
+
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    """Cache, memory and session counters of this process"""
+    return jsonify({
+        "embedding_cache": get_embeddings().stats(),
+        "semantic_cache": semantic_cache.stats(),
+        "bm25_index": retriever.bm25.stats(),
+        "memory": memory_store.stats(),
+        "memory_summarizer": memory_summarizer.stats(),
+        "sessions": sessions.stats()
+    })
+
 @app.route('/api/feed-input', methods=['POST'])
 def feed_input():
-    global latest_query, latest_user_details
-    
     data = request.get_json()
     if not data or 'input' not in data:
         return jsonify({"error": "No input provided in request body"}), 400
     
-    latest_query = data['input']
-    latest_user_details = data.get('userDetails', {})
+    # Pass the returned session_id to the processing endpoints to get this query back
+    session = {"session_id": new_session_id(), "query": data['input'], "user_details": data.get('userDetails', {})}
+    sessions.put(session["session_id"], session)
     
     return jsonify({
         "message": "Input saved successfully",
-        "saved_input": latest_query,
-        "user_details": latest_user_details
+        "session_id": session["session_id"],
+        "saved_input": session["query"],
+        "user_details": session["user_details"]
     })
 
 @app.route('/api/saved-query', methods=['GET'])
 def get_saved_query():
-    global latest_query
-    if not latest_query:
-        return jsonify({"error": "No query has been saved yet"}), 404
+    session, error, status = load_session()
+    if session is None:
+        return jsonify({"error": error}), status
     
     try:
         response = rag_chain.invoke({
-            "question": latest_query,
+            "question": session["query"],
             "user_id": "default_user"
         })
         return jsonify({
-            "saved_query": latest_query,
+            "session_id": session["session_id"],
+            "saved_query": session["query"],
             "response": response
         })
     except Exception as e:
@@ -0,0 +1,96 @@
+"""Recall and latency of the vector store backends on a synthetic corpus.
+
+Builds the same clustered set of random unit vectors into the numpy
+(exact), hnsw (approximate, needs hnswlib) and Qdrant local-mode (in
+process, no server) backends. Every backend answers the same queries
+through similarity_search_by_vector, the call the RAG service makes. It
+reports build time, query latency, and recall@k against exact brute-force
+neighbours. No embedding API is called.
+
+Usage:
+    python bench_vector_index.py [--count 20000] [--dim 1536] [--queries 200] [--k 4]
+"""
+import argparse
+import shutil
+import statistics
+import tempfile
+import time
+import uuid
+import numpy as np
+from langchain_community.vectorstores import Qdrant
+from langchain_core.embeddings import FakeEmbeddings
+from qdrant_client import QdrantClient
+from qdrant_client.http.models import Distance, PointStruct, VectorParams
+from local_index import LocalVectorStore
+
+def make_corpus(count: int, dim: int, queries: int, seed: int = 0):
+    """Unit vectors around a few hundred centres, like chunks from a set of judgments"""
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(max(1, count // 50), dim)).astype(np.float32)
+    data = centres[rng.integers(len(centres), size=count)] + 0.5 * rng.normal(size=(count, dim)).astype(np.float32)
+    data /= np.linalg.norm(data, axis=1, keepdims=True)
+    probes = data[rng.integers(count, size=queries)] + 0.3 * rng.normal(size=(queries, dim)).astype(np.float32)
+    probes /= np.linalg.norm(probes, axis=1, keepdims=True)
+    return data, probes
+
+def build_local(directory: str, data: np.ndarray, ann: bool) -> LocalVectorStore:
+    store = LocalVectorStore(directory, FakeEmbeddings(size=data.shape[1]), ann=ann)
+    store.add_embeddings([str(i) for i in range(len(data))], data.tolist(), [{} for _ in range(len(data))], [str(i) for i in range(len(data))])
+    if ann:
+        # Build the graph as part of the build, not the first query
+        store.similarity_search_by_vector(data[0].tolist(), k=1)
+    return store
+
+def build_qdrant(data: np.ndarray) -> Qdrant:
+    client = QdrantClient(location=":memory:")
+    client.create_collection("bench", vectors_config=VectorParams(size=data.shape[1], distance=Distance.COSINE))
+    for start in range(0, len(data), 1000):
+        client.upsert("bench", points=[
+            PointStruct(id=str(uuid.UUID(int=i)), vector=data[i].tolist(), payload={"page_content": str(i), "metadata": {}})
+            for i in range(start, min(start + 1000, len(data)))
+        ])
+    return Qdrant(client=client, collection_name="bench", embeddings=FakeEmbeddings(size=data.shape[1]))
+
+def run(name: str, store, probes: np.ndarray, truth: np.ndarray, k: int, build_seconds: float):
+    latencies, hits = [], 0
+    for probe, expected in zip(probes, truth):
+        start = time.perf_counter()
+        docs = store.similarity_search_by_vector(probe.tolist(), k=k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += len({int(doc.page_content) for doc in docs} & set(expected.tolist()))
+    latencies.sort()
+    print(f"{name:>8}  {build_seconds:>8.1f}s  {statistics.median(latencies):>8.2f}  "
+          f"{latencies[int(0.95 * (len(latencies) - 1))]:>8.2f}  {hits / truth.size:>8.1%}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=20000, help="vectors in the corpus")
+    parser.add_argument("--dim", type=int, default=1536, help="dimensions (1536 for text-embedding-ada-002)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=4)
+    args = parser.parse_args()
+
+    data, probes = make_corpus(args.count, args.dim, args.queries)
+    truth = np.argsort(-(probes @ data.T), axis=1)[:, :args.k]
+
+    print(f"{args.count} vectors x {args.dim} dims, {args.queries} queries, k={args.k}")
+    print(f"{'backend':>8}  {'build':>9}  {'p50 ms':>8}  {'p95 ms':>8}  {'recall':>8}")
+    directory = tempfile.mkdtemp(prefix="bench_vector_index_")
+    try:
+        backends = [("numpy", lambda: build_local(f"{directory}/numpy", data, ann=False))]
+        try:
+            import hnswlib  # noqa: F401
+            backends.append(("hnsw", lambda: build_local(f"{directory}/hnsw", data, ann=True)))
+        except ImportError:
+            print("    hnsw  skipped: hnswlib is not installed")
+        backends.append(("qdrant", lambda: build_qdrant(data)))
+
+        for name, build in backends:
+            start = time.perf_counter()
+            store = build()
+            run(name, store, probes, truth, args.k, time.perf_counter() - start)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
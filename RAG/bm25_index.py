@@ -0,0 +1,228 @@
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from langchain_core.documents import Document
+import json
+import math
+import os
+import re
+import threading
+import numpy as np
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# BM25 term saturation and length normalization
+BM25_K1 = float(os.getenv("BM25_K1", "1.2"))
+BM25_B = float(os.getenv("BM25_B", "0.75"))
+
+# Words plus legal references: "6(1)(a)" stays one token (and also yields
+# "6"), so "Section 6(1)" matches exactly while "Section 6" still matches it
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:\([a-z0-9]{1,4}\))*")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were which with "
+    "shall said such any all not no been being may will would".split()
+)
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        tokens.append(token)
+        if "(" in token:
+            tokens.append(token[:token.index("(")])
+    return tokens
+
+class BM25Index:
+    """Inverted index with BM25 scoring over the same chunks as the vector store.
+
+    Each term's postings are two typed arrays, chunk rows (uint32) and term
+    frequencies (uint16), so the index stays compact and can be scored with
+    NumPy without building Python objects per posting. Chunks can be added
+    and deleted at any time; deleted rows are skipped at query time and
+    dropped when the index is saved.
+
+    Saved as bm25.npz (all postings concatenated, with per-term offsets)
+    plus documents.jsonl, and loaded on first use.
+    """
+
+    def __init__(self, directory: str, k1: float = BM25_K1, b: float = BM25_B):
+        self.directory = directory
+        self.k1 = k1
+        self.b = b
+        self.lock = threading.RLock()
+        self.loaded = False
+        self.terms: Dict[str, int] = {}
+        self.postings_rows: List[array] = []
+        self.postings_tfs: List[array] = []
+        self.lengths = array("I")
+        self.documents: List[Optional[dict]] = []
+        self.rows: Dict[str, int] = {}
+        self.alive = bytearray()
+        self.total_length = 0
+
+    def _load(self):
+        if self.loaded:
+            return
+        with self.lock:
+            if self.loaded:
+                return
+            index_path = os.path.join(self.directory, "bm25.npz")
+            if os.path.exists(index_path):
+                with np.load(index_path) as data:
+                    offsets, rows, tfs = data["offsets"], data["rows"], data["tfs"]
+                    self.lengths = array("I", data["lengths"].tobytes())
+                    terms = data["terms"].tolist()
+                for term_id, term in enumerate(terms):
+                    self.terms[term] = term_id
+                    start, end = offsets[term_id], offsets[term_id + 1]
+                    self.postings_rows.append(array("I", rows[start:end].tobytes()))
+                    self.postings_tfs.append(array("H", tfs[start:end].tobytes()))
+                with open(os.path.join(self.directory, "documents.jsonl"), encoding="utf-8") as f:
+                    self.documents = [json.loads(line) for line in f]
+                self.rows = {document["id"]: row for row, document in enumerate(self.documents)}
+                self.alive = bytearray(b"\x01" * len(self.documents))
+                self.total_length = sum(self.lengths)
+            self.loaded = True
+
+    def __len__(self) -> int:
+        self._load()
+        return len(self.rows)
+
+    def add(self, ids: List[str], texts: List[str], metadatas: Optional[List[dict]] = None):
+        """Index chunks; an id that is already indexed is replaced"""
+        self._load()
+        metadatas = metadatas or [{} for _ in texts]
+        with self.lock:
+            self.delete([id for id in ids if id in self.rows])
+            for id, text, metadata in zip(ids, texts, metadatas):
+                row = len(self.documents)
+                counts: Dict[str, int] = {}
+                for token in tokenize(text):
+                    counts[token] = counts.get(token, 0) + 1
+                for token, count in counts.items():
+                    term_id = self.terms.get(token)
+                    if term_id is None:
+                        term_id = self.terms[token] = len(self.postings_rows)
+                        self.postings_rows.append(array("I"))
+                        self.postings_tfs.append(array("H"))
+                    self.postings_rows[term_id].append(row)
+                    self.postings_tfs[term_id].append(min(count, 65535))
+                length = sum(counts.values())
+                self.lengths.append(length)
+                self.total_length += length
+                self.documents.append({"id": id, "page_content": text, "metadata": metadata})
+                self.alive.append(1)
+                self.rows[id] = row
+
+    def delete(self, ids: Iterable[str]) -> int:
+        self._load()
+        deleted = 0
+        with self.lock:
+            for id in ids:
+                row = self.rows.pop(id, None)
+                if row is not None:
+                    self.documents[row] = None
+                    self.alive[row] = 0
+                    self.total_length -= self.lengths[row]
+                    deleted += 1
+        return deleted
+
+    def delete_where(self, key: str, value: Any) -> int:
+        """Delete every chunk whose metadata[key] equals value"""
+        self._load()
+        with self.lock:
+            return self.delete([
+                document["id"] for document in self.documents
+                if document is not None and document["metadata"].get(key) == value
+            ])
+
+    def search(self, query: str, k: int = 4) -> List[Tuple[Document, float]]:
+        """The k best-scoring live chunks for a query, best first"""
+        self._load()
+        with self.lock:
+            count = len(self.rows)
+            if not count:
+                return []
+            average_length = self.total_length / count or 1.0
+            # np.array copies, so no view keeps the growable arrays from being appended to
+            lengths = np.array(self.lengths, dtype=np.float32)
+            norms = self.k1 * (1 - self.b + self.b * lengths / average_length)
+            scores = np.zeros(len(self.documents), dtype=np.float32)
+            for token in set(tokenize(query)):
+                term_id = self.terms.get(token)
+                if term_id is None:
+                    continue
+                rows = np.array(self.postings_rows[term_id], dtype=np.int64)
+                tfs = np.array(self.postings_tfs[term_id], dtype=np.float32)
+                idf = math.log(1 + (count - len(rows) + 0.5) / (len(rows) + 0.5))
+                # Each row appears at most once per term, so plain fancy-index addition is safe
+                scores[rows] += idf * tfs * (self.k1 + 1) / (tfs + norms[rows])
+            scores[np.array(self.alive, dtype=np.uint8) == 0] = 0
+            candidates = np.flatnonzero(scores > 0)
+            if not len(candidates):
+                return []
+            top = candidates[np.argsort(-scores[candidates], kind="stable")[:k]]
+            results = []
+            for row in top:
+                document = self.documents[row]
+                results.append((
+                    Document(page_content=document["page_content"], metadata={**document["metadata"], "_id": document["id"]}),
+                    float(scores[row])
+                ))
+            return results
+
+    def save(self):
+        """Write the index without deleted chunks, replacing the previous files atomically"""
+        self._load()
+        with self.lock:
+            live = [row for row, document in enumerate(self.documents) if document is not None]
+            renumber = np.full(len(self.documents), -1, dtype=np.int64)
+            renumber[live] = np.arange(len(live))
+            terms, offsets, rows, tfs = [], [0], [], []
+            for term, term_id in self.terms.items():
+                term_rows = np.array(self.postings_rows[term_id], dtype=np.int64)
+                term_tfs = np.array(self.postings_tfs[term_id], dtype=np.uint16)
+                keep = renumber[term_rows] >= 0
+                if not keep.any():
+                    continue
+                terms.append(term)
+                rows.append(renumber[term_rows[keep]].astype(np.uint32))
+                tfs.append(term_tfs[keep])
+                offsets.append(offsets[-1] + int(keep.sum()))
+            os.makedirs(self.directory, exist_ok=True)
+            index_path = os.path.join(self.directory, "bm25.npz")
+            with open(index_path + ".tmp", "wb") as f:
+                np.savez(
+                    f,
+                    terms=np.array(terms, dtype=str),
+                    offsets=np.array(offsets, dtype=np.int64),
+                    rows=np.concatenate(rows) if rows else np.zeros(0, dtype=np.uint32),
+                    tfs=np.concatenate(tfs) if tfs else np.zeros(0, dtype=np.uint16),
+                    lengths=np.array(self.lengths, dtype=np.uint32)[live] if live else np.zeros(0, dtype=np.uint32)
+                )
+            documents_path = os.path.join(self.directory, "documents.jsonl")
+            with open(documents_path + ".tmp", "w", encoding="utf-8") as f:
+                for row in live:
+                    f.write(json.dumps(self.documents[row], ensure_ascii=False) + "\n")
+            os.replace(index_path + ".tmp", index_path)
+            os.replace(documents_path + ".tmp", documents_path)
+
+            # Continue in memory with the compacted layout
+            self.loaded = False
+            self.terms, self.postings_rows, self.postings_tfs = {}, [], []
+            self.lengths, self.documents, self.rows, self.alive, self.total_length = array("I"), [], {}, bytearray(), 0
+            self._load()
+
+    def stats(self) -> dict:
+        self._load()
+        with self.lock:
+            postings = sum(len(rows) for rows in self.postings_rows)
+            return {
+                "chunks": len(self.rows),
+                "terms": len(self.terms),
+                "postings": postings,
+                "postings_bytes": postings * 6
+            }
@@ -0,0 +1,196 @@
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence
+from langchain_core.documents import Document
+import math
+import os
+import re
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Tokens of retrieved context plus memory allowed in one prompt, the share of
+# that budget memory may take (whatever it leaves unused goes to context),
+# and the smallest remainder worth filling with a truncated chunk
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "6000"))
+MEMORY_TOKEN_SHARE = float(os.getenv("MEMORY_TOKEN_SHARE", "0.25"))
+MIN_CHUNK_TOKENS = int(os.getenv("MIN_CHUNK_TOKENS", "100"))
+
+# A chunk is a duplicate when this share of its word 8-grams is already in
+# the packed context; shorter shared runs at a chunk boundary (the overlap
+# ingest repeats between neighbouring chunks) are cut instead
+DUPLICATE_THRESHOLD = float(os.getenv("DUPLICATE_THRESHOLD", "0.8"))
+MIN_OVERLAP_CHARS = 50
+SHINGLE_SIZE = 8
+
+WORD_PATTERN = re.compile(r"\w+")
+
+class TokenCounter:
+    """Counts tokens with the model's tiktoken encoding.
+
+    tiktoken fetches an encoding file the first time it is used; when the
+    package or the file is not available, counts fall back to an estimate
+    of one token per four characters.
+    """
+
+    def __init__(self, model: Optional[str] = None):
+        self.encoding = None
+        try:
+            import tiktoken
+            try:
+                self.encoding = tiktoken.encoding_for_model(model or "")
+            except KeyError:
+                self.encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            print(f"tiktoken unavailable ({type(e).__name__}); estimating tokens from length")
+        self.name = self.encoding.name if self.encoding is not None else "estimate"
+
+    def count(self, text: str) -> int:
+        if self.encoding is not None:
+            return len(self.encoding.encode(text, disallowed_special=()))
+        return math.ceil(len(text) / 4)
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """The longest prefix of text within max_tokens, ending at a word boundary"""
+        if max_tokens <= 0:
+            return ""
+        if self.encoding is not None:
+            tokens = self.encoding.encode(text, disallowed_special=())
+            if len(tokens) <= max_tokens:
+                return text
+            prefix = self.encoding.decode(tokens[:max_tokens])
+        else:
+            if len(text) <= max_tokens * 4:
+                return text
+            prefix = text[:max_tokens * 4]
+        cut = prefix.rfind(" ")
+        return prefix[:cut] if cut > len(prefix) // 2 else prefix
+
+@lru_cache(maxsize=None)
+def get_token_counter(model: Optional[str] = None) -> TokenCounter:
+    return TokenCounter(model or os.getenv("MODEL_NAME"))
+
+def shingles(text: str) -> set:
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) < SHINGLE_SIZE:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+def boundary_overlap(first: str, second: str) -> int:
+    """Length of the longest end of first that second starts with (0 if under MIN_OVERLAP_CHARS)"""
+    probe = second[:MIN_OVERLAP_CHARS]
+    if len(probe) < MIN_OVERLAP_CHARS:
+        return 0
+    start = first.find(probe, max(0, len(first) - len(second)))
+    while start != -1:
+        if second.startswith(first[start:]):
+            return len(first) - start
+        start = first.find(probe, start + 1)
+    return 0
+
+def trim_overlap(text: str, packed: Sequence[str]) -> str:
+    """Remove from text the start or end it shares with a chunk already packed"""
+    for other in packed:
+        head = boundary_overlap(other, text)
+        if head:
+            text = text[head:].lstrip()
+        tail = boundary_overlap(text, other)
+        if tail:
+            text = text[:len(text) - tail].rstrip()
+    return text
+
+def pack_chunks(docs: List[Document], budget: int, counter: TokenCounter) -> Dict:
+    """Fill the budget with chunks in relevance order.
+
+    docs come from the retriever best first. Duplicates are dropped, text
+    shared with a better chunk is cut, and a chunk that does not fit is
+    skipped in favour of smaller ones further down, except that the first
+    one that does not fit is truncated into the room left if that is at
+    least MIN_CHUNK_TOKENS.
+    """
+    packed, seen = [], set()
+    used = duplicates = over_budget = truncated = 0
+    for doc in docs:
+        grams = shingles(doc.page_content)
+        if not grams or len(grams & seen) >= DUPLICATE_THRESHOLD * len(grams):
+            duplicates += 1
+            continue
+        text = trim_overlap(doc.page_content, packed)
+        if not text:
+            duplicates += 1
+            continue
+        # Two newlines separate chunks
+        tokens = counter.count(text) + (2 if packed else 0)
+        if used + tokens > budget:
+            room = budget - used - (2 if packed else 0)
+            if truncated or room < MIN_CHUNK_TOKENS:
+                over_budget += 1
+                continue
+            text = counter.truncate(text, room)
+            tokens = counter.count(text) + (2 if packed else 0)
+            truncated += 1
+        packed.append(text)
+        seen |= grams
+        used += tokens
+    return {
+        "text": "\n\n".join(packed),
+        "tokens": used,
+        "chunks_used": len(packed),
+        "chunks_duplicate": duplicates,
+        "chunks_truncated": truncated,
+        "chunks_over_budget": over_budget
+    }
+
+def pack_memory(memories: List[str], budget: int, counter: TokenCounter) -> Dict:
+    """The most recent interactions that fit the budget, oldest first.
+
+    Older turns are dropped before newer ones; the latest turn alone is
+    truncated if it is bigger than the whole budget.
+    """
+    packed, used = [], 0
+    for memory in reversed(memories):
+        tokens = counter.count(memory) + (2 if packed else 0)
+        if used + tokens > budget:
+            if not packed:
+                memory = counter.truncate(memory, budget)
+                if memory:
+                    packed.append(memory)
+                    used = counter.count(memory)
+            break
+        packed.append(memory)
+        used += tokens
+    packed.reverse()
+    return {"turns": packed, "tokens": used}
+
+def pack_prompt(docs: List[Document], memories: List[str], question: str, template: str = "",
+                budget: int = PROMPT_TOKEN_BUDGET, memory_share: float = MEMORY_TOKEN_SHARE) -> Dict:
+    """Retrieved chunks and memory cut to one token budget.
+
+    Memory is packed first, into at most memory_share of the budget; the
+    context gets the rest. Returns the context string, the memory turns to
+    put in the prompt and a token_usage report for the request (prompt
+    tokens are the template, question, context and memory together).
+    """
+    counter = get_token_counter()
+    memory = pack_memory(memories, int(budget * memory_share), counter)
+    context = pack_chunks(docs, budget - memory["tokens"], counter)
+    question_tokens = counter.count(question)
+    return {
+        "context": context["text"],
+        "memory": memory["turns"],
+        "token_usage": {
+            "tokenizer": counter.name,
+            "budget": budget,
+            "context_tokens": context["tokens"],
+            "memory_tokens": memory["tokens"],
+            "question_tokens": question_tokens,
+            "prompt_tokens": (counter.count(template) if template else 0) + question_tokens + context["tokens"] + memory["tokens"],
+            "chunks_retrieved": len(docs),
+            "chunks_used": context["chunks_used"],
+            "chunks_duplicate": context["chunks_duplicate"],
+            "chunks_truncated": context["chunks_truncated"],
+            "chunks_over_budget": context["chunks_over_budget"],
+            "memory_turns": len(memories),
+            "memory_turns_used": len(memory["turns"])
+        }
+    }
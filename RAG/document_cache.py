@@ -0,0 +1,101 @@
+from typing import Optional
+import os
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Where the analyzer gets the parsed text of the uploaded document
+PLAIN_TEXT_URL = os.getenv("PLAIN_TEXT_URL", "http://localhost:8000/api/plain-text")
+
+# Connect and read timeouts in seconds, and how long a fetched document is
+# used without asking the backend whether it changed (0: ask every time)
+DOCUMENT_CONNECT_TIMEOUT = float(os.getenv("DOCUMENT_CONNECT_TIMEOUT", "3"))
+DOCUMENT_READ_TIMEOUT = float(os.getenv("DOCUMENT_READ_TIMEOUT", "30"))
+DOCUMENT_MAX_AGE = float(os.getenv("DOCUMENT_MAX_AGE", "2"))
+
+class DocumentCache:
+    """The backend's parsed document, downloaded once and kept until it changes.
+
+    Each check is a conditional GET over a pooled keep-alive session, sending
+    the ETag and Last-Modified of the copy held; a 304 answer costs no body.
+    When the backend sends neither header the document is downloaded again
+    on every check. One check runs at a time: requests that arrive while it
+    is in flight wait for it and use its result instead of checking again,
+    and for max_age seconds after a check the copy is used without one.
+    """
+
+    def __init__(self, url: str = PLAIN_TEXT_URL, timeout=(DOCUMENT_CONNECT_TIMEOUT, DOCUMENT_READ_TIMEOUT),
+                 max_age: float = DOCUMENT_MAX_AGE):
+        self.url = url
+        self.timeout = timeout
+        self.max_age = max_age
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.text = None
+        self.etag = None
+        self.last_modified = None
+        self.checked_at = 0.0
+        self.lock = threading.Lock()
+        self.downloads = 0
+        self.not_modified = 0
+        self.fresh_hits = 0
+        self.errors = 0
+        self.bytes_downloaded = 0
+
+    def _clear(self):
+        self.text, self.etag, self.last_modified = None, None, None
+
+    def get(self) -> Optional[str]:
+        """The document's text, or None if the backend has none or cannot be reached"""
+        requested_at = time.monotonic()
+        with self.lock:
+            # A check that finished after this call started (while it waited
+            # for the lock) is as fresh as one this call would make
+            if self.text is not None and (self.checked_at >= requested_at
+                                          or requested_at - self.checked_at < self.max_age):
+                self.fresh_hits += 1
+                return self.text
+            headers = {}
+            if self.text is not None and self.etag:
+                headers["If-None-Match"] = self.etag
+            if self.text is not None and self.last_modified:
+                headers["If-Modified-Since"] = self.last_modified
+            try:
+                response = self.session.get(self.url, headers=headers, timeout=self.timeout)
+            except requests.RequestException as e:
+                print(f"Error fetching document from {self.url}: {e}")
+                self.errors += 1
+                return None
+            if response.status_code == 304 and self.text is not None:
+                self.not_modified += 1
+            elif response.status_code == 200:
+                self.text = response.text.strip()
+                self.etag = response.headers.get("ETag")
+                self.last_modified = response.headers.get("Last-Modified")
+                self.downloads += 1
+                self.bytes_downloaded += len(response.content)
+            else:
+                # No document (any more)
+                self._clear()
+                return None
+            self.checked_at = time.monotonic()
+            return self.text
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "cached": self.text is not None,
+                "chars": len(self.text) if self.text is not None else 0,
+                "downloads": self.downloads,
+                "not_modified": self.not_modified,
+                "fresh_hits": self.fresh_hits,
+                "errors": self.errors,
+                "bytes_downloaded": self.bytes_downloaded
+            }
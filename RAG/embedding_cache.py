@@ -0,0 +1,179 @@
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from langchain_core.embeddings import Embeddings
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# OpenAI embedding model used for both queries and ingested chunks
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-ada-002")
+
+# Vectors kept in memory, and an optional SQLite file (with its own limit)
+# that keeps them across restarts and is shared with ingestion
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "embedding_cache.db")
+EMBEDDING_CACHE_DISK_SIZE = int(os.getenv("EMBEDDING_CACHE_DISK_SIZE", "1000000"))
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so trivially different copies of a text share an entry"""
+    return " ".join(text.split())
+
+def embedding_key(model: str, text: str) -> str:
+    return hashlib.sha256(f"{model}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+class EmbeddingStore:
+    """Float32 vectors in a local SQLite file, evicting the least recently used beyond max_size"""
+
+    def __init__(self, path: str, max_size: int = EMBEDDING_CACHE_DISK_SIZE):
+        self.max_size = max_size
+        self.evictions = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                """CREATE TABLE IF NOT EXISTS embeddings (
+                    key TEXT PRIMARY KEY,
+                    vector BLOB NOT NULL,
+                    accessed_at REAL NOT NULL
+                )"""
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS embeddings_accessed ON embeddings (accessed_at)")
+
+    def get_many(self, keys: List[str]) -> Dict[str, array]:
+        found = {}
+        now = time.time()
+        with self.lock, self.conn:
+            # Stay below SQLite's limit on bound parameters
+            for start in range(0, len(keys), 500):
+                group = keys[start:start + 500]
+                placeholders = ",".join("?" * len(group))
+                for key, blob in self.conn.execute(f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", group):
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    found[key] = vector
+            self.conn.executemany("UPDATE embeddings SET accessed_at = ? WHERE key = ?", [(now, key) for key in found])
+        return found
+
+    def put_many(self, items: Dict[str, array]):
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, accessed_at) VALUES (?, ?, ?)",
+                [(key, vector.tobytes(), now) for key, vector in items.items()]
+            )
+            count = self.conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            if count > self.max_size:
+                cursor = self.conn.execute(
+                    "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY accessed_at LIMIT ?)",
+                    (count - self.max_size,)
+                )
+                self.evictions += cursor.rowcount
+
+    def stats(self) -> dict:
+        with self.lock:
+            entries = self.conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        return {"entries": entries, "max_size": self.max_size, "evictions": self.evictions}
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that only sends texts it has not seen before to the model.
+
+    Vectors are keyed on the model name and the whitespace-normalized text.
+    They are looked up in an in-process LRU of max_size entries first and
+    then in the optional on-disk store. Queries and document chunks share
+    the cache, so re-indexing unchanged chunks costs no API calls.
+    """
+
+    def __init__(self, embeddings: Embeddings, model: str, max_size: int = EMBEDDING_CACHE_SIZE, store: Optional[EmbeddingStore] = None):
+        self.embeddings = embeddings
+        self.model = model
+        self.max_size = max_size
+        self.store = store
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _remember(self, key: str, vector: array):
+        with self.lock:
+            self.entries[key] = vector
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def _lookup(self, keys: List[str]) -> Dict[str, array]:
+        found = {}
+        with self.lock:
+            for key in keys:
+                vector = self.entries.get(key)
+                if vector is not None:
+                    self.entries.move_to_end(key)
+                    found[key] = vector
+        memory_hits = len(found)
+        missing = [key for key in keys if key not in found]
+        if missing and self.store is not None:
+            for key, vector in self.store.get_many(missing).items():
+                found[key] = vector
+                self._remember(key, vector)
+        with self.lock:
+            self.memory_hits += memory_hits
+            self.disk_hits += len(found) - memory_hits
+            self.misses += len(keys) - len(found)
+        return found
+
+    def _save(self, vectors: Dict[str, array]):
+        for key, vector in vectors.items():
+            self._remember(key, vector)
+        if self.store is not None and vectors:
+            self.store.put_many(vectors)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [embedding_key(self.model, text) for text in texts]
+        # Each distinct text is looked up and embedded once
+        unique = dict(zip(keys, texts))
+        found = self._lookup(list(unique))
+        missing = [key for key in unique if key not in found]
+        if missing:
+            computed = self.embeddings.embed_documents([unique[key] for key in missing])
+            vectors = {key: array("f", vector) for key, vector in zip(missing, computed)}
+            self._save(vectors)
+            found.update(vectors)
+        return [found[key].tolist() for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        key = embedding_key(self.model, text)
+        found = self._lookup([key])
+        if key not in found:
+            found[key] = array("f", self.embeddings.embed_query(text))
+            self._save({key: found[key]})
+        return found[key].tolist()
+
+    def stats(self) -> dict:
+        with self.lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            stats = {
+                "hits": self.memory_hits + self.disk_hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 3) if lookups else None,
+                "memory": {"entries": len(self.entries), "max_size": self.max_size, "evictions": self.evictions}
+            }
+        if self.store is not None:
+            stats["disk"] = self.store.stats()
+        return stats
+
+def cached_embeddings(embeddings: Embeddings, model: str) -> CachedEmbeddings:
+    """Wrap embeddings with the cache configured by the EMBEDDING_CACHE_* settings"""
+    store = EmbeddingStore(EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_DISK_SIZE) if EMBEDDING_CACHE_PATH else None
+    return CachedEmbeddings(embeddings, model, EMBEDDING_CACHE_SIZE, store)
@@ -0,0 +1,57 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence
+from langchain_core.documents import Document
+from bm25_index import BM25Index
+from semantic_cache import document_ids
+import os
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Chunks returned per query, candidates taken from each retriever before
+# fusion, the reciprocal-rank-fusion constant, and the weight of each ranking
+RETRIEVAL_K = int(os.getenv("RETRIEVAL_K", "4"))
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "20"))
+RRF_K = int(os.getenv("RRF_K", "60"))
+HYBRID_VECTOR_WEIGHT = float(os.getenv("HYBRID_VECTOR_WEIGHT", "1.0"))
+HYBRID_BM25_WEIGHT = float(os.getenv("HYBRID_BM25_WEIGHT", "1.0"))
+
+def reciprocal_rank_fusion(rankings: Sequence[List[Document]], weights: Sequence[float], rrf_k: int = RRF_K, k: int = RETRIEVAL_K) -> List[Document]:
+    """Merge ranked lists: a chunk scores sum(weight / (rrf_k + rank)) over the lists it appears in"""
+    scores: Dict[str, float] = {}
+    documents: Dict[str, Document] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, (id, document) in enumerate(zip(document_ids(ranking), ranking), start=1):
+            scores[id] = scores.get(id, 0.0) + weight / (rrf_k + rank)
+            documents.setdefault(id, document)
+    best = sorted(scores, key=scores.get, reverse=True)[:k]
+    return [documents[id] for id in best]
+
+class HybridRetriever:
+    """Vector search and BM25 keyword search run side by side, merged with RRF.
+
+    Exact tokens such as "Article 21", "6(1)" or "AIR 1978 SC 597" are
+    often missed by embedding similarity alone; the BM25 ranking brings
+    those chunks back. With an empty keyword index this is plain vector
+    search.
+    """
+
+    def __init__(self, vectorstore, bm25: Optional[BM25Index], k: int = RETRIEVAL_K, candidates: int = HYBRID_CANDIDATES,
+                 rrf_k: int = RRF_K, vector_weight: float = HYBRID_VECTOR_WEIGHT, bm25_weight: float = HYBRID_BM25_WEIGHT):
+        self.vectorstore = vectorstore
+        self.bm25 = bm25
+        self.k = k
+        self.candidates = candidates
+        self.rrf_k = rrf_k
+        self.vector_weight = vector_weight
+        self.bm25_weight = bm25_weight
+        self.executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="bm25")
+
+    def search(self, query: str, embedding: List[float]) -> List[Document]:
+        if self.bm25 is None or not len(self.bm25):
+            return self.vectorstore.similarity_search_by_vector(embedding, k=self.k)
+        keyword = self.executor.submit(self.bm25.search, query, self.candidates)
+        semantic = self.vectorstore.similarity_search_by_vector(embedding, k=self.candidates)
+        keyword = [document for document, _ in keyword.result()]
+        return reciprocal_rank_fusion([semantic, keyword], [self.vector_weight, self.bm25_weight], self.rrf_k, self.k)
@@ -0,0 +1,417 @@
+"""Bulk ingestion of Supreme Court judgments into the vector store.
+
+Walks a directory of judgment texts (.txt, .md) and PDFs, splits every
+judgment into overlapping chunks tagged with case name, citation, year and
+paragraph numbers, embeds the chunks in concurrent batches (through the
+embedding cache, with backoff on rate limits) and writes them in batches to
+Qdrant, in the payload layout langchain's Qdrant store reads, or to the
+local index used by the numpy and hnsw backends.
+
+The same chunks are added to the BM25 keyword index used by hybrid
+retrieval as they are written.
+
+A checkpoint file records the content hash of every file already ingested.
+It is saved with the keyword index every INGEST_CHECKPOINT_INTERVAL
+seconds and at the end, so an interrupted run resumes close to where it
+stopped and a re-run only touches new or changed files. Point ids are
+derived from the file and chunk number, so re-ingesting a file overwrites
+its points instead of adding duplicates.
+
+Usage:
+    python ingest.py judgments/ [--url http://localhost:6333 | --path ./qdrant_data | --location :memory:]
+                                [--collection my_documents] [--chunk-size 1500] [--chunk-overlap 200]
+    python ingest.py judgments/ --backend hnsw [--index-dir vector_index]
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Tuple
+import openai
+from dotenv import load_dotenv
+from langchain_openai import OpenAIEmbeddings
+from qdrant_client import QdrantClient
+from qdrant_client.http.models import Distance, FieldCondition, Filter, FilterSelector, MatchValue, PointStruct, VectorParams
+from embedding_cache import cached_embeddings, EMBEDDING_MODEL
+from local_index import LocalVectorStore
+from bm25_index import BM25Index
+
+# Load environment variables
+load_dotenv()
+
+# Chunk size and overlap in characters
+CHUNK_SIZE = int(os.getenv("INGEST_CHUNK_SIZE", "1500"))
+CHUNK_OVERLAP = int(os.getenv("INGEST_CHUNK_OVERLAP", "200"))
+
+# Texts per embedding request, embedding requests in flight, and points per upsert
+EMBED_BATCH_SIZE = int(os.getenv("INGEST_EMBED_BATCH_SIZE", "256"))
+EMBED_CONCURRENCY = int(os.getenv("INGEST_EMBED_CONCURRENCY", "4"))
+UPSERT_BATCH_SIZE = int(os.getenv("INGEST_UPSERT_BATCH_SIZE", "256"))
+
+# Retries of one embedding batch on rate limits and transient errors
+EMBED_MAX_RETRIES = int(os.getenv("INGEST_EMBED_MAX_RETRIES", "6"))
+
+# Seconds between saves of the checkpoint and the keyword index; a run
+# that is interrupted redoes at most this much work
+CHECKPOINT_INTERVAL = float(os.getenv("INGEST_CHECKPOINT_INTERVAL", "60"))
+
+COLLECTION_NAME = "my_documents"
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "qdrant")
+LOCAL_INDEX_DIR = os.getenv("LOCAL_INDEX_DIR", "vector_index")
+BM25_INDEX_DIR = os.getenv("BM25_INDEX_DIR", "bm25_index")
+CHECKPOINT_PATH = "ingest_checkpoint.json"
+SUPPORTED_EXTENSIONS = (".txt", ".md", ".pdf")
+
+# Stable namespace for point ids, so the same chunk always gets the same id
+POINT_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "casecanopy/judgments")
+
+# Reporter citations as they appear in Indian judgments
+CITATION_PATTERN = re.compile(
+    r"\(\d{4}\)\s*\d+\s*SCC\s*\d+"
+    r"|AIR\s*\d{4}\s*SC\s*\d+"
+    r"|\[\d{4}\]\s*\d+\s*S\.?C\.?R\.?\s*\d+"
+    r"|\d{4}\s*INSC\s*\d+"
+)
+YEAR_PATTERN = re.compile(r"\b(19[5-9]\d|20\d\d)\b")
+CASE_NAME_PATTERN = re.compile(r"^(.{3,200}?\s(?:v\.|vs\.?|versus)\s.{3,200})$", re.IGNORECASE | re.MULTILINE)
+# Numbered paragraphs: "12." or "12)" at the start of a paragraph
+PARAGRAPH_NUMBER_PATTERN = re.compile(r"^\s*(\d{1,4})[.)]\s")
+
+def read_text(path: str) -> str:
+    if path.lower().endswith(".pdf"):
+        # Only needed for PDFs, so plain text corpora work without it
+        from pypdf import PdfReader
+        return "\n\n".join(page.extract_text() or "" for page in PdfReader(path).pages)
+    with open(path, encoding="utf-8", errors="replace") as f:
+        return f.read()
+
+def iter_files(directory: str) -> Iterator[str]:
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(SUPPORTED_EXTENSIONS):
+                yield os.path.join(root, name)
+
+def extract_metadata(text: str, source: str) -> dict:
+    """Case name, citation and year of a judgment, from its opening text"""
+    head = text[:5000]
+    case_name = CASE_NAME_PATTERN.search(head)
+    citation = CITATION_PATTERN.search(head)
+    year = YEAR_PATTERN.search(citation.group(0)) if citation else YEAR_PATTERN.search(head)
+    return {
+        "source": source,
+        "case_name": " ".join(case_name.group(1).split()) if case_name else os.path.splitext(os.path.basename(source))[0],
+        "citation": " ".join(citation.group(0).split()) if citation else None,
+        "year": int(year.group(1)) if year else None
+    }
+
+def split_paragraphs(text: str) -> List[Tuple[str, int]]:
+    """Paragraphs with the judgment paragraph number each one falls under (0 before the first)"""
+    paragraphs = []
+    number = 0
+    for block in re.split(r"\n\s*\n", text):
+        block = " ".join(block.split())
+        if not block:
+            continue
+        match = PARAGRAPH_NUMBER_PATTERN.match(block)
+        if match:
+            number = int(match.group(1))
+        paragraphs.append((block, number))
+    return paragraphs
+
+def chunk_text(text: str, chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP) -> List[Tuple[str, str]]:
+    """Split text into chunks of about chunk_size characters that repeat the
+    last chunk_overlap characters of the previous chunk.
+
+    Chunks break between paragraphs where possible. Returns (chunk, paragraph
+    range) pairs, the range being like "12" or "12-14".
+    """
+    # Cut paragraphs longer than a chunk at word boundaries first
+    pieces = []
+    for paragraph, number in split_paragraphs(text):
+        while len(paragraph) > chunk_size:
+            cut = paragraph.rfind(" ", 0, chunk_size)
+            cut = cut if cut > chunk_size // 2 else chunk_size
+            pieces.append((paragraph[:cut], number))
+            paragraph = paragraph[cut:].lstrip()
+        if paragraph:
+            pieces.append((paragraph, number))
+
+    chunks = []
+    current, numbers = "", []
+    for piece, number in pieces:
+        if current and len(current) + len(piece) + 1 > chunk_size:
+            chunks.append((current, numbers))
+            # Start the next chunk with the tail of this one, from a word boundary
+            tail = current[-chunk_overlap:] if chunk_overlap else ""
+            if " " in tail and len(current) > chunk_overlap:
+                tail = tail[tail.index(" ") + 1:]
+            current, numbers = tail, numbers[-1:] if tail else []
+        current = f"{current} {piece}" if current else piece
+        if number not in numbers:
+            numbers.append(number)
+    if current:
+        chunks.append((current, numbers))
+
+    ranges = []
+    for chunk, numbers in chunks:
+        numbers = [number for number in numbers if number] or [0]
+        ranges.append((chunk, str(numbers[0]) if numbers[0] == numbers[-1] else f"{numbers[0]}-{numbers[-1]}"))
+    return ranges
+
+def embed_with_backoff(embeddings, texts: List[str]) -> List[List[float]]:
+    """embed_documents, retried with exponential backoff and jitter on rate limits and transient errors"""
+    for attempt in range(EMBED_MAX_RETRIES + 1):
+        try:
+            return embeddings.embed_documents(texts)
+        except (openai.RateLimitError, openai.APIConnectionError, openai.APITimeoutError, openai.InternalServerError) as e:
+            if attempt == EMBED_MAX_RETRIES:
+                raise
+            delay = min(60.0, 2 ** attempt) * (0.5 + random.random())
+            print(f"Embedding batch failed ({type(e).__name__}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+class Checkpoint:
+    """Content hashes of the files already in the collection"""
+
+    def __init__(self, path: str, collection: str):
+        self.path = path
+        self.files: Dict[str, str] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("collection") == collection:
+                self.files = data.get("files", {})
+        self.collection = collection
+
+    def save(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"collection": self.collection, "files": self.files}, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+class QdrantTarget:
+    """Writes points to a Qdrant collection, creating it on the first write"""
+
+    def __init__(self, client: QdrantClient, collection: str = COLLECTION_NAME):
+        self.client = client
+        self.collection = collection
+        self.ready = False
+
+    def _exists(self) -> bool:
+        # get_collections rather than collection_exists, which needs qdrant-client 1.8
+        return any(collection.name == self.collection for collection in self.client.get_collections().collections)
+
+    def delete_source(self, source: str):
+        if self.ready or self._exists():
+            self.client.delete(self.collection, points_selector=FilterSelector(filter=Filter(must=[
+                FieldCondition(key="metadata.source", match=MatchValue(value=source))
+            ])))
+
+    def write(self, points: List[PointStruct]):
+        if not self.ready:
+            if not self._exists():
+                self.client.create_collection(self.collection, vectors_config=VectorParams(size=len(points[0].vector), distance=Distance.COSINE))
+            self.ready = True
+        for start in range(0, len(points), UPSERT_BATCH_SIZE):
+            self.client.upsert(self.collection, points=points[start:start + UPSERT_BATCH_SIZE], wait=True)
+
+    def finish(self):
+        pass
+
+class LocalTarget:
+    """Writes points to the local index of the numpy and hnsw backends"""
+
+    def __init__(self, store: LocalVectorStore):
+        self.store = store
+
+    def delete_source(self, source: str):
+        self.store.index.delete_where("source", source)
+
+    def write(self, points: List[PointStruct]):
+        self.store.add_embeddings(
+            [point.payload["page_content"] for point in points],
+            [point.vector for point in points],
+            [point.payload["metadata"] for point in points],
+            [point.id for point in points]
+        )
+
+    def finish(self):
+        # Drop the rows of replaced chunks, then build the HNSW graph now
+        # instead of on the service's first query
+        self.store.index.compact()
+        if self.store.ann is not None and len(self.store.index):
+            self.store.ann.search(self.store.index.vectors[0], 1)
+
+class Ingestor:
+    def __init__(self, target, embeddings, checkpoint: Checkpoint = None,
+                 chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP, keyword_index: BM25Index = None):
+        self.target = target
+        self.embeddings = embeddings
+        self.checkpoint = checkpoint
+        self.keyword_index = keyword_index
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.files = 0
+        self.skipped = 0
+        self.failed = 0
+        self.chunks = 0
+        self.saved_at = time.monotonic()
+
+    def _prepare(self, path: str, source: str) -> Tuple[str, List[PointStruct]]:
+        """Content hash and unembedded points (vector left empty) of one file"""
+        text = read_text(path)
+        content_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        if self.checkpoint is not None and self.checkpoint.files.get(source) == content_hash:
+            return content_hash, None
+        metadata = extract_metadata(text, source)
+        points = []
+        for index, (chunk, paragraphs) in enumerate(chunk_text(text, self.chunk_size, self.chunk_overlap)):
+            points.append(PointStruct(
+                id=str(uuid.uuid5(POINT_NAMESPACE, f"{source}:{index}")),
+                vector=[],
+                payload={
+                    "page_content": chunk,
+                    "metadata": {**metadata, "paragraph": paragraphs, "chunk": index, "content_hash": content_hash}
+                }
+            ))
+        return content_hash, points
+
+    def _embed(self, points: List[PointStruct]):
+        batches = [points[i:i + EMBED_BATCH_SIZE] for i in range(0, len(points), EMBED_BATCH_SIZE)]
+
+        def embed(batch: List[PointStruct]):
+            vectors = embed_with_backoff(self.embeddings, [point.payload["page_content"] for point in batch])
+            for point, vector in zip(batch, vectors):
+                point.vector = vector
+
+        with ThreadPoolExecutor(max_workers=EMBED_CONCURRENCY, thread_name_prefix="embed") as executor:
+            list(executor.map(embed, batches))
+
+    def _flush(self, group: List[Tuple[str, str, List[PointStruct]]]):
+        points = [point for _, _, file_points in group for point in file_points]
+        if points:
+            self._embed(points)
+        # Drop the chunks of earlier versions before writing the new ones
+        for source, _, _ in group:
+            if self.checkpoint is not None and source in self.checkpoint.files:
+                self.target.delete_source(source)
+                if self.keyword_index is not None:
+                    self.keyword_index.delete_where("source", source)
+        if points:
+            self.target.write(points)
+            if self.keyword_index is not None:
+                self.keyword_index.add(
+                    [str(point.id) for point in points],
+                    [point.payload["page_content"] for point in points],
+                    [point.payload["metadata"] for point in points]
+                )
+        self.chunks += len(points)
+        if self.checkpoint is not None:
+            for source, content_hash, _ in group:
+                self.checkpoint.files[source] = content_hash
+        if time.monotonic() - self.saved_at >= CHECKPOINT_INTERVAL:
+            self._save()
+
+    def _save(self):
+        # The keyword index is rewritten whole, so it is saved on an interval
+        # rather than per group, always with the checkpoint so both describe
+        # the same files
+        if self.keyword_index is not None:
+            self.keyword_index.save()
+        if self.checkpoint is not None:
+            self.checkpoint.save()
+        self.saved_at = time.monotonic()
+
+    def ingest(self, directory: str):
+        """Ingest every new or changed file under directory"""
+        if self.keyword_index is not None and self.checkpoint is not None and self.checkpoint.files and not len(self.keyword_index):
+            # Files ingested before the keyword index existed; go through them
+            # again (their embeddings come from the cache and ids are stable)
+            print("Keyword index is empty, re-ingesting every file to build it")
+            self.checkpoint.files = {}
+        group, pending = [], 0
+        # Enough chunks per group to keep every embedding worker busy with full batches
+        group_size = EMBED_BATCH_SIZE * EMBED_CONCURRENCY
+        for path in iter_files(directory):
+            source = os.path.relpath(path, directory)
+            try:
+                content_hash, points = self._prepare(path, source)
+            except Exception as e:
+                print(f"Skipping {source}: {str(e)}")
+                self.failed += 1
+                continue
+            if points is None:
+                self.skipped += 1
+                continue
+            group.append((source, content_hash, points))
+            pending += len(points)
+            self.files += 1
+            if pending >= group_size:
+                self._flush(group)
+                group, pending = [], 0
+        if group:
+            self._flush(group)
+        self._save()
+        self.target.finish()
+
+def make_target(args):
+    if args.backend in ("numpy", "hnsw"):
+        return LocalTarget(LocalVectorStore(args.index_dir, None, ann=args.backend == "hnsw"))
+    return QdrantTarget(make_client(args), args.collection)
+
+def make_client(args) -> QdrantClient:
+    if args.location:
+        return QdrantClient(location=args.location)
+    if args.path:
+        return QdrantClient(path=args.path)
+    if not args.url:
+        raise SystemExit("Pass --url (or set QDRANT_URL), --path or --location")
+    return QdrantClient(url=args.url, api_key=args.api_key)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory", help="directory of judgment .txt, .md and .pdf files")
+    parser.add_argument("--url", default=os.getenv("QDRANT_URL"), help="Qdrant server URL (default: QDRANT_URL)")
+    parser.add_argument("--api-key", default=os.getenv("QDRANT_API_KEY"), help="Qdrant API key (default: QDRANT_API_KEY)")
+    parser.add_argument("--path", help="local on-disk Qdrant directory instead of a server")
+    parser.add_argument("--location", help="':memory:' for a throwaway in-process Qdrant")
+    parser.add_argument("--collection", default=COLLECTION_NAME)
+    parser.add_argument("--backend", default=VECTOR_BACKEND, choices=["qdrant", "numpy", "hnsw"],
+                        help="where to write the chunks (default: VECTOR_BACKEND)")
+    parser.add_argument("--index-dir", default=LOCAL_INDEX_DIR, help="local index directory for the numpy and hnsw backends")
+    parser.add_argument("--bm25-dir", default=BM25_INDEX_DIR, help="BM25 keyword index directory (default: BM25_INDEX_DIR)")
+    parser.add_argument("--no-bm25", action="store_true", help="do not build the keyword index")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_PATH, help="file recording what was ingested already")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--chunk-overlap", type=int, default=CHUNK_OVERLAP)
+    args = parser.parse_args()
+
+    target = make_target(args)
+    # A throwaway collection must not leave a checkpoint claiming its files are ingested
+    local = args.backend in ("numpy", "hnsw")
+    checkpoint = None if args.location == ":memory:" and not local else Checkpoint(
+        args.checkpoint, os.path.abspath(args.index_dir) if local else args.collection
+    )
+    embeddings = cached_embeddings(OpenAIEmbeddings(model=EMBEDDING_MODEL), EMBEDDING_MODEL)
+    keyword_index = None if args.no_bm25 or (args.location == ":memory:" and not local) else BM25Index(args.bm25_dir)
+    ingestor = Ingestor(target, embeddings, checkpoint, args.chunk_size, args.chunk_overlap, keyword_index)
+
+    start = time.perf_counter()
+    ingestor.ingest(args.directory)
+    elapsed = time.perf_counter() - start
+
+    cache = embeddings.stats()
+    print(f"Ingested {ingestor.files} files ({ingestor.skipped} unchanged, {ingestor.failed} failed) "
+          f"into {ingestor.chunks} chunks in {elapsed:.1f}s: {ingestor.chunks / elapsed if elapsed else 0:.1f} chunks/s")
+    print(f"Embeddings: {cache['misses']} computed, {cache['hits']} from cache")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+from typing import Any, Iterable, List, Optional, Tuple
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+import json
+import os
+import threading
+import uuid
+import numpy as np
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# HNSW graph parameters: links per node, build-time and query-time beam width
+HNSW_M = int(os.getenv("HNSW_M", "16"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "200"))
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "256"))
+
+class LocalIndex:
+    """Append-only vector file plus document log in one directory on local disk.
+
+    vectors.f32 holds unit-normalized float32 rows and is memory-mapped on
+    first use, so opening a large index costs nothing until it is searched.
+    documents.jsonl has one line per row (id, page_content, metadata) and
+    a {"deleted": id} line for every removal. Writing an id again appends a
+    new row and retires the old one; compact() drops retired rows.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.vectors_path = os.path.join(directory, "vectors.f32")
+        self.documents_path = os.path.join(directory, "documents.jsonl")
+        self.lock = threading.RLock()
+        self.loaded = False
+        self.dimension = None
+        self.vectors = None
+        self.documents = []
+        self.rows = {}
+        self.alive = np.zeros(0, dtype=bool)
+        # Bumped whenever rows are renumbered, so derived indexes know to rebuild
+        self.generation = 0
+
+    def _load(self):
+        if self.loaded:
+            return
+        with self.lock:
+            if self.loaded:
+                return
+            if os.path.exists(self.documents_path):
+                with open(self.documents_path, encoding="utf-8") as f:
+                    for line in f:
+                        record = json.loads(line)
+                        if "deleted" in record:
+                            row = self.rows.pop(record["deleted"], None)
+                            if row is not None:
+                                self.documents[row] = None
+                            continue
+                        previous = self.rows.get(record["id"])
+                        if previous is not None:
+                            self.documents[previous] = None
+                        self.rows[record["id"]] = len(self.documents)
+                        self.documents.append(record)
+            if self.documents and os.path.exists(self.vectors_path):
+                size = os.path.getsize(self.vectors_path) // 4
+                self.dimension = size // len(self.documents)
+            self._map()
+            self.loaded = True
+
+    def _map(self):
+        count = len(self.documents)
+        self.vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(count, self.dimension)) if count else None
+        self.alive = np.array([document is not None for document in self.documents], dtype=bool)
+
+    def __len__(self) -> int:
+        self._load()
+        return len(self.rows)
+
+    def add(self, ids: List[str], texts: List[str], vectors: List[List[float]], metadatas: List[dict]):
+        self._load()
+        matrix = np.asarray(vectors, dtype=np.float32)
+        matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+        with self.lock:
+            if self.dimension is None:
+                self.dimension = matrix.shape[1]
+            elif matrix.shape[1] != self.dimension:
+                raise ValueError(f"Vectors have {matrix.shape[1]} dimensions, the index has {self.dimension}")
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self.vectors_path, "ab") as f:
+                f.write(matrix.tobytes())
+            with open(self.documents_path, "a", encoding="utf-8") as f:
+                for id, text, metadata in zip(ids, texts, metadatas):
+                    record = {"id": id, "page_content": text, "metadata": metadata}
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    previous = self.rows.get(id)
+                    if previous is not None:
+                        self.documents[previous] = None
+                    self.rows[id] = len(self.documents)
+                    self.documents.append(record)
+            self._map()
+
+    def delete(self, ids: Iterable[str]) -> int:
+        self._load()
+        with self.lock:
+            ids = [id for id in ids if id in self.rows]
+            with open(self.documents_path, "a", encoding="utf-8") as f:
+                for id in ids:
+                    f.write(json.dumps({"deleted": id}) + "\n")
+                    self.documents[self.rows.pop(id)] = None
+            self._map()
+            return len(ids)
+
+    def delete_where(self, key: str, value: Any) -> int:
+        """Delete every row whose metadata[key] equals value"""
+        self._load()
+        with self.lock:
+            return self.delete([
+                document["id"] for document in self.documents
+                if document is not None and document["metadata"].get(key) == value
+            ])
+
+    def compact(self):
+        """Rewrite both files without retired rows"""
+        self._load()
+        with self.lock:
+            live = np.flatnonzero(self.alive)
+            if len(live) == len(self.documents):
+                return
+            vectors = np.asarray(self.vectors[live]) if len(live) else np.zeros((0, self.dimension or 0), dtype=np.float32)
+            documents = [self.documents[row] for row in live]
+            self.vectors = None
+            with open(self.vectors_path + ".tmp", "wb") as f:
+                f.write(vectors.tobytes())
+            with open(self.documents_path + ".tmp", "w", encoding="utf-8") as f:
+                for document in documents:
+                    f.write(json.dumps(document, ensure_ascii=False) + "\n")
+            os.replace(self.vectors_path + ".tmp", self.vectors_path)
+            os.replace(self.documents_path + ".tmp", self.documents_path)
+            for name in ("hnsw.bin", "hnsw.bin.json"):
+                if os.path.exists(os.path.join(self.directory, name)):
+                    os.remove(os.path.join(self.directory, name))
+            self.generation += 1
+            self.documents = documents
+            self.rows = {document["id"]: row for row, document in enumerate(documents)}
+            self._map()
+
+    def search(self, vector: List[float], k: int) -> List[Tuple[int, float]]:
+        """Exact cosine search: (row, score) of the k best live rows"""
+        self._load()
+        with self.lock:
+            vectors, alive = self.vectors, self.alive
+        if vectors is None or not alive.any():
+            return []
+        query = np.asarray(vector, dtype=np.float32)
+        query /= np.linalg.norm(query) or 1.0
+        scores = vectors @ query
+        scores[~alive] = -np.inf
+        k = min(k, int(alive.sum()))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(row), float(scores[row])) for row in top]
+
+    def document(self, row: int) -> Document:
+        record = self.documents[row]
+        return Document(page_content=record["page_content"], metadata={**record["metadata"], "_id": record["id"]})
+
+class HNSWIndex:
+    """hnswlib graph over the rows of a LocalIndex, saved next to it as hnsw.bin.
+
+    The graph is loaded (or built) on the first search. Rows added since
+    it was saved are inserted then, and retired rows are marked deleted,
+    so it never has to be rebuilt from scratch.
+    """
+
+    def __init__(self, index: LocalIndex, m: int = HNSW_M, ef_construction: int = HNSW_EF_CONSTRUCTION, ef_search: int = HNSW_EF_SEARCH):
+        import hnswlib  # optional dependency, only needed for this backend
+        self.hnswlib = hnswlib
+        self.index = index
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.path = os.path.join(index.directory, "hnsw.bin")
+        self.graph = None
+        self.generation = index.generation
+        self.rows = 0
+        self.deleted = set()
+        self.lock = threading.Lock()
+
+    def _sync(self):
+        index = self.index
+        index._load()
+        total = len(index.documents)
+        if self.generation != index.generation:
+            # Rows were renumbered by compact(); start over
+            self.graph, self.rows, self.deleted = None, 0, set()
+            self.generation = index.generation
+        if self.graph is None:
+            self.graph = self.hnswlib.Index(space="cosine", dim=index.dimension)
+            meta_path = self.path + ".json"
+            if os.path.exists(self.path) and os.path.exists(meta_path):
+                with open(meta_path, encoding="utf-8") as f:
+                    meta = json.load(f)
+                if meta["rows"] <= total:
+                    self.graph.load_index(self.path, max_elements=max(total, 1))
+                    self.rows = meta["rows"]
+                    self.deleted = set(meta["deleted"])
+            if self.rows == 0:
+                self.graph.init_index(max_elements=max(total, 1), ef_construction=self.ef_construction, M=self.m)
+        changed = False
+        if total > self.rows:
+            if total > self.graph.get_max_elements():
+                self.graph.resize_index(total)
+            self.graph.add_items(np.asarray(index.vectors[self.rows:total]), np.arange(self.rows, total))
+            self.rows = total
+            changed = True
+        for row in np.flatnonzero(~index.alive[:self.rows]).tolist():
+            if row not in self.deleted:
+                self.graph.mark_deleted(row)
+                self.deleted.add(row)
+                changed = True
+        if changed:
+            self.graph.save_index(self.path)
+            with open(self.path + ".json", "w", encoding="utf-8") as f:
+                json.dump({"rows": self.rows, "deleted": sorted(self.deleted)}, f)
+        self.graph.set_ef(max(self.ef_search, 1))
+
+    def search(self, vector: List[float], k: int) -> List[Tuple[int, float]]:
+        with self.lock:
+            if not len(self.index):
+                return []
+            self._sync()
+            k = min(k, self.rows - len(self.deleted))
+            if k <= 0:
+                return []
+            labels, distances = self.graph.knn_query(np.asarray(vector, dtype=np.float32), k=k)
+        return [(int(row), 1.0 - float(distance)) for row, distance in zip(labels[0], distances[0])]
+
+class LocalVectorStore(VectorStore):
+    """langchain VectorStore over a LocalIndex, searched exactly with NumPy
+    (ann=False) or through an HNSW graph (ann=True)."""
+
+    def __init__(self, directory: str, embeddings: Embeddings, ann: bool = False):
+        self.index = LocalIndex(directory)
+        self._embeddings = embeddings
+        self.ann = HNSWIndex(self.index) if ann else None
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embeddings
+
+    def add_embeddings(self, texts: List[str], vectors: List[List[float]], metadatas: Optional[List[dict]] = None, ids: Optional[List[str]] = None) -> List[str]:
+        """Add texts whose vectors were already computed"""
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+        self.index.add(ids, texts, vectors, metadatas or [{} for _ in texts])
+        return ids
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None, ids: Optional[List[str]] = None, **kwargs: Any) -> List[str]:
+        texts = list(texts)
+        return self.add_embeddings(texts, self._embeddings.embed_documents(texts), metadatas, ids)
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        return self.index.delete(ids or []) > 0
+
+    def similarity_search_with_score_by_vector(self, embedding: List[float], k: int = 4) -> List[Tuple[Document, float]]:
+        rows = self.ann.search(embedding, k) if self.ann is not None else self.index.search(embedding, k)
+        return [(self.index.document(row), score) for row, score in rows]
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [document for document, _ in self.similarity_search_with_score_by_vector(embedding, k)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self._embeddings.embed_query(query), k)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [document for document, _ in self.similarity_search_with_score(query, k)]
+
+    def _select_relevance_score_fn(self):
+        return lambda score: score
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None, directory: str = "vector_index", ann: bool = False, **kwargs: Any) -> "LocalVectorStore":
+        store = cls(directory, embedding, ann)
+        store.add_texts(texts, metadatas, **kwargs)
+        return store
@@ -0,0 +1,532 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+import os
+import sqlite3
+import threading
+import time
+import numpy as np
+from dotenv import load_dotenv
+from context_packing import get_token_counter
+
+# Load environment variables
+load_dotenv()
+
+# Per-user limits on stored interactions: how many turns and how many UTF-8
+# bytes of them. Older turns are dropped first.
+MEMORY_MAX_TURNS = int(os.getenv("MEMORY_MAX_TURNS", "10"))
+MEMORY_MAX_BYTES = int(os.getenv("MEMORY_MAX_BYTES", "65536"))
+
+# Users kept at most, and how long an idle user's history is kept; the
+# least recently used users are evicted beyond either limit
+MEMORY_MAX_USERS = int(os.getenv("MEMORY_MAX_USERS", "10000"))
+MEMORY_USER_TTL = float(os.getenv("MEMORY_USER_TTL", "604800"))
+
+# Optional SQLite file; when set, every worker process that uses the same
+# file sees the same history, and it survives restarts
+MEMORY_STORE_PATH = os.getenv("MEMORY_STORE_PATH", "")
+
+# Once a user has more than MEMORY_SUMMARY_THRESHOLD turns (0 disables
+# it), all but the last MEMORY_RECENT_TURNS are folded into a running
+# summary of about MEMORY_SUMMARY_WORDS words, in the background
+MEMORY_SUMMARY_THRESHOLD = int(os.getenv("MEMORY_SUMMARY_THRESHOLD", "4"))
+MEMORY_RECENT_TURNS = int(os.getenv("MEMORY_RECENT_TURNS", "2"))
+MEMORY_SUMMARY_WORDS = int(os.getenv("MEMORY_SUMMARY_WORDS", "200"))
+
+# Turns recalled into a prompt: the MEMORY_RECALL_K most similar to the
+# new question plus the MEMORY_RECALL_RECENT latest ones, together with the
+# summary within MEMORY_RECALL_TOKENS. The summary leaves only the last
+# MEMORY_RECENT_TURNS in the history, so turns folded into it are kept for
+# recall too: the last MEMORY_RECALL_ARCHIVE of them that were saved with
+# an embedding (within MEMORY_MAX_BYTES), out of the prompt unless recalled
+MEMORY_RECALL_K = int(os.getenv("MEMORY_RECALL_K", "3"))
+MEMORY_RECALL_RECENT = int(os.getenv("MEMORY_RECALL_RECENT", "1"))
+MEMORY_RECALL_TOKENS = int(os.getenv("MEMORY_RECALL_TOKENS", "1500"))
+MEMORY_RECALL_ARCHIVE = int(os.getenv("MEMORY_RECALL_ARCHIVE", "20"))
+
+SUMMARY_PROMPT = """You maintain a running summary of a user's conversation with a legal assistant. The summary is given to the assistant in place of the full conversation.
+
+Current summary:
+{summary}
+
+New interactions:
+{turns}
+
+Write the updated summary in at most {words} words. Keep the user's circumstances, every question they asked, the conclusions given, and the cases, statutes and provisions relied on. Leave out the structure and wording of the answers. Reply with the summary only."""
+
+def cap_turns(turns: List[str], max_turns: int, max_bytes: int) -> List[str]:
+    """The newest turns within both limits; the latest turn alone is cut to max_bytes"""
+    kept, size = [], 0
+    for turn in reversed(turns[-max_turns:] if max_turns > 0 else []):
+        turn_size = len(turn.encode("utf-8"))
+        if size + turn_size > max_bytes:
+            if not kept:
+                kept.append(turn.encode("utf-8")[:max_bytes].decode("utf-8", "ignore"))
+            break
+        kept.append(turn)
+        size += turn_size
+    kept.reverse()
+    return kept
+
+def folded_count(live: List[str], turns: List[str]) -> int:
+    """How many of the leading live turns are the folded turns, matched by
+    position; turns the cap has dropped since folding began are not there"""
+    for dropped in range(len(turns) + 1):
+        remaining = turns[dropped:]
+        if live[:len(remaining)] == remaining:
+            return len(remaining)
+    return 0
+
+def cap_archive(archive: List[Tuple[str, np.ndarray]], max_turns: int, max_bytes: int) -> List[Tuple[str, np.ndarray]]:
+    """The newest archived turns within both limits"""
+    kept = cap_turns([text for text, _ in archive], max_turns, max_bytes)
+    return archive[len(archive) - len(kept):]
+
+def unit_vector(embedding: Sequence[float]) -> np.ndarray:
+    vector = np.asarray(embedding, dtype=np.float32)
+    return vector / (np.linalg.norm(vector) or 1.0)
+
+class MemoryStore:
+    """Conversation history per user id, kept in this process.
+
+    Each user's turns are capped by count and by bytes, and whole users are
+    evicted in least-recently-used order once there are more than max_users
+    or they have been idle for longer than ttl seconds. A user may also have
+    a running summary of turns folded out of the list (see MemorySummarizer).
+    A turn can carry the embedding of its question, used by recall_memory;
+    folded turns that have one move to the user's archive of up to
+    archive_turns, where recall_memory can still find them.
+    """
+
+    def __init__(self, max_turns: int = MEMORY_MAX_TURNS, max_bytes: int = MEMORY_MAX_BYTES,
+                 max_users: int = MEMORY_MAX_USERS, ttl: float = MEMORY_USER_TTL,
+                 archive_turns: int = MEMORY_RECALL_ARCHIVE):
+        self.max_turns = max_turns
+        self.max_bytes = max_bytes
+        self.max_users = max_users
+        self.ttl = ttl
+        self.archive_turns = archive_turns
+        # user id -> {"turns", "vectors", "archive", "summary", "bytes", "accessed_at"}
+        self.users = OrderedDict()
+        self.bytes = 0
+        self.lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+        self.dropped_turns = 0
+
+    def _evict(self, now: float):
+        while self.users:
+            user_id, entry = next(iter(self.users.items()))
+            if len(self.users) > self.max_users:
+                self.evictions += 1
+            elif now - entry["accessed_at"] > self.ttl:
+                self.expirations += 1
+            else:
+                break
+            del self.users[user_id]
+            self.bytes -= entry["bytes"]
+
+    def _resize(self, entry: dict):
+        size = len(entry["summary"].encode("utf-8")) + sum(len(turn.encode("utf-8")) for turn in entry["turns"])
+        size += sum(vector.nbytes for vector in entry["vectors"] if vector is not None)
+        size += sum(len(text.encode("utf-8")) + vector.nbytes for text, vector in entry["archive"])
+        self.bytes += size - entry["bytes"]
+        entry["bytes"] = size
+
+    def history_with_embeddings(self, user_id: str) -> Tuple[str, List[str], List[Optional[np.ndarray]], List[Tuple[str, np.ndarray]]]:
+        """history() plus each turn's unit question vector (None if it was saved
+        without one) and the archive of folded turns with theirs, oldest first"""
+        now = time.time()
+        with self.lock:
+            self._evict(now)
+            entry = self.users.get(user_id)
+            if entry is None:
+                return "", [], [], []
+            entry["accessed_at"] = now
+            self.users.move_to_end(user_id)
+            return entry["summary"], list(entry["turns"]), list(entry["vectors"]), list(entry["archive"])
+
+    def history(self, user_id: str) -> Tuple[str, List[str]]:
+        """The user's running summary ("" if none) and the turns after it, oldest first"""
+        return self.history_with_embeddings(user_id)[:2]
+
+    def get(self, user_id: str) -> List[str]:
+        return self.history(user_id)[1]
+
+    def append(self, user_id: str, text: str, embedding: Optional[Sequence[float]] = None):
+        now = time.time()
+        vector = unit_vector(embedding) if embedding is not None else None
+        with self.lock:
+            entry = self.users.pop(user_id, None) or {"turns": [], "vectors": [], "archive": [], "summary": "", "bytes": 0}
+            kept = cap_turns(entry["turns"] + [text], self.max_turns, self.max_bytes)
+            self.dropped_turns += len(entry["turns"]) + 1 - len(kept)
+            # kept is a suffix of the turns, so the vectors keep the same suffix
+            vectors = (entry["vectors"] + [vector])[len(entry["turns"]) + 1 - len(kept):]
+            entry["turns"], entry["vectors"], entry["accessed_at"] = kept, vectors, now
+            self.users[user_id] = entry
+            self._resize(entry)
+            self._evict(now)
+
+    def fold(self, user_id: str, previous_summary: str, turns: List[str], summary: str) -> bool:
+        """Replace the leading turns with summary, if the summary is still
+        previous_summary (nobody folded in the meantime), and archive those
+        with a vector. Turns the cap has dropped since are simply no longer there."""
+        with self.lock:
+            entry = self.users.get(user_id)
+            if entry is None or entry["summary"] != previous_summary:
+                return False
+            archive = entry["archive"]
+            for _ in range(folded_count(entry["turns"], turns)):
+                text, vector = entry["turns"].pop(0), entry["vectors"].pop(0)
+                if vector is not None:
+                    archive.append((text, vector))
+            entry["archive"] = cap_archive(archive, self.archive_turns, self.max_bytes)
+            entry["summary"] = summary
+            self._resize(entry)
+            return True
+
+    def clear(self, user_id: str):
+        with self.lock:
+            entry = self.users.pop(user_id, None)
+            if entry is not None:
+                self.bytes -= entry["bytes"]
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "backend": "memory",
+                "users": len(self.users),
+                "turns": sum(len(entry["turns"]) for entry in self.users.values()),
+                "archived_turns": sum(len(entry["archive"]) for entry in self.users.values()),
+                "summaries": sum(1 for entry in self.users.values() if entry["summary"]),
+                "bytes": self.bytes,
+                "max_users": self.max_users,
+                "max_bytes_per_user": self.max_bytes,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "dropped_turns": self.dropped_turns
+            }
+
+class SQLiteMemoryStore:
+    """MemoryStore with the same limits, kept in a SQLite file.
+
+    Worker processes opening the same file share one history. namespace
+    keeps services that use the same file (the advisor and the document
+    analyzer) apart. Archived turns are rows flagged archived. Eviction
+    counters are counted per process.
+    """
+
+    def __init__(self, path: str, namespace: str = "", max_turns: int = MEMORY_MAX_TURNS, max_bytes: int = MEMORY_MAX_BYTES,
+                 max_users: int = MEMORY_MAX_USERS, ttl: float = MEMORY_USER_TTL, archive_turns: int = MEMORY_RECALL_ARCHIVE):
+        self.namespace = namespace
+        self.max_turns = max_turns
+        self.max_bytes = max_bytes
+        self.max_users = max_users
+        self.ttl = ttl
+        self.archive_turns = archive_turns
+        self.lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+        self.dropped_turns = 0
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self.lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                """CREATE TABLE IF NOT EXISTS memory_users (
+                    namespace TEXT NOT NULL,
+                    user_id TEXT NOT NULL,
+                    bytes INTEGER NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    summary TEXT NOT NULL DEFAULT '',
+                    PRIMARY KEY (namespace, user_id)
+                )"""
+            )
+            columns = [row[1] for row in self.conn.execute("PRAGMA table_info(memory_users)")]
+            if "summary" not in columns:
+                self.conn.execute("ALTER TABLE memory_users ADD COLUMN summary TEXT NOT NULL DEFAULT ''")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS memory_users_accessed ON memory_users (namespace, accessed_at)")
+            self.conn.execute(
+                """CREATE TABLE IF NOT EXISTS memory_turns (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    namespace TEXT NOT NULL,
+                    user_id TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    bytes INTEGER NOT NULL,
+                    embedding BLOB,
+                    archived INTEGER NOT NULL DEFAULT 0
+                )"""
+            )
+            columns = [row[1] for row in self.conn.execute("PRAGMA table_info(memory_turns)")]
+            if "embedding" not in columns:
+                self.conn.execute("ALTER TABLE memory_turns ADD COLUMN embedding BLOB")
+            if "archived" not in columns:
+                self.conn.execute("ALTER TABLE memory_turns ADD COLUMN archived INTEGER NOT NULL DEFAULT 0")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS memory_turns_user ON memory_turns (namespace, user_id, id)")
+
+    def _delete_users(self, user_ids: List[str]):
+        for user_id in user_ids:
+            self.conn.execute("DELETE FROM memory_turns WHERE namespace = ? AND user_id = ?", (self.namespace, user_id))
+            self.conn.execute("DELETE FROM memory_users WHERE namespace = ? AND user_id = ?", (self.namespace, user_id))
+
+    def _evict(self, now: float):
+        expired = [row[0] for row in self.conn.execute(
+            "SELECT user_id FROM memory_users WHERE namespace = ? AND accessed_at < ?", (self.namespace, now - self.ttl)
+        )]
+        self._delete_users(expired)
+        self.expirations += len(expired)
+        count = self.conn.execute("SELECT COUNT(*) FROM memory_users WHERE namespace = ?", (self.namespace,)).fetchone()[0]
+        if count > self.max_users:
+            evicted = [row[0] for row in self.conn.execute(
+                "SELECT user_id FROM memory_users WHERE namespace = ? ORDER BY accessed_at LIMIT ?",
+                (self.namespace, count - self.max_users)
+            )]
+            self._delete_users(evicted)
+            self.evictions += len(evicted)
+
+    def _resize(self, user_id: str):
+        self.conn.execute(
+            """UPDATE memory_users SET bytes = LENGTH(CAST(summary AS BLOB)) + COALESCE(
+                (SELECT SUM(bytes) FROM memory_turns WHERE namespace = ? AND user_id = ?), 0)
+            WHERE namespace = ? AND user_id = ?""",
+            (self.namespace, user_id, self.namespace, user_id)
+        )
+
+    def _history(self, user_id: str, columns: str) -> Tuple[str, list]:
+        now = time.time()
+        with self.lock, self.conn:
+            row = self.conn.execute(
+                "SELECT summary FROM memory_users WHERE namespace = ? AND user_id = ? AND accessed_at >= ?",
+                (self.namespace, user_id, now - self.ttl)
+            ).fetchone()
+            if row is None:
+                return "", []
+            self.conn.execute(
+                "UPDATE memory_users SET accessed_at = ? WHERE namespace = ? AND user_id = ?", (now, self.namespace, user_id)
+            )
+            return row[0], self.conn.execute(
+                f"SELECT archived, {columns} FROM memory_turns WHERE namespace = ? AND user_id = ? ORDER BY id",
+                (self.namespace, user_id)
+            ).fetchall()
+
+    def history_with_embeddings(self, user_id: str) -> Tuple[str, List[str], List[Optional[np.ndarray]], List[Tuple[str, np.ndarray]]]:
+        summary, rows = self._history(user_id, "text, embedding")
+        to_vector = lambda blob: np.frombuffer(blob, dtype=np.float32) if blob is not None else None
+        turns = [(text, to_vector(blob)) for archived, text, blob in rows if not archived]
+        archive = [(text, to_vector(blob)) for archived, text, blob in rows if archived]
+        return summary, [text for text, _ in turns], [vector for _, vector in turns], archive
+
+    def history(self, user_id: str) -> Tuple[str, List[str]]:
+        summary, rows = self._history(user_id, "text")
+        return summary, [text for archived, text in rows if not archived]
+
+    def get(self, user_id: str) -> List[str]:
+        return self.history(user_id)[1]
+
+    def append(self, user_id: str, text: str, embedding: Optional[Sequence[float]] = None):
+        now = time.time()
+        blob = unit_vector(embedding).tobytes() if embedding is not None else None
+        with self.lock, self.conn:
+            rows = self.conn.execute(
+                "SELECT id, text FROM memory_turns WHERE namespace = ? AND user_id = ? AND archived = 0 ORDER BY id",
+                (self.namespace, user_id)
+            ).fetchall()
+            kept = cap_turns([turn for _, turn in rows] + [text], self.max_turns, self.max_bytes)
+            # cap_turns keeps a suffix; every earlier stored turn goes, and the
+            # new turn may have been cut
+            stale = [id for id, _ in rows[:len(rows) + 1 - len(kept)]]
+            self.dropped_turns += len(stale) + (0 if kept else 1)
+            self.conn.executemany("DELETE FROM memory_turns WHERE id = ?", [(id,) for id in stale])
+            if kept:
+                self.conn.execute(
+                    "INSERT INTO memory_turns (namespace, user_id, text, bytes, embedding) VALUES (?, ?, ?, ?, ?)",
+                    (self.namespace, user_id, kept[-1], len(kept[-1].encode("utf-8")) + len(blob or b""), blob)
+                )
+            self.conn.execute(
+                """INSERT INTO memory_users (namespace, user_id, bytes, accessed_at) VALUES (?, ?, 0, ?)
+                ON CONFLICT (namespace, user_id) DO UPDATE SET accessed_at = excluded.accessed_at""",
+                (self.namespace, user_id, now)
+            )
+            self._resize(user_id)
+            self._evict(now)
+
+    def fold(self, user_id: str, previous_summary: str, turns: List[str], summary: str) -> bool:
+        with self.lock, self.conn:
+            row = self.conn.execute(
+                "SELECT summary FROM memory_users WHERE namespace = ? AND user_id = ?", (self.namespace, user_id)
+            ).fetchone()
+            if row is None or row[0] != previous_summary:
+                return False
+            rows = self.conn.execute(
+                """SELECT id, text, embedding IS NOT NULL FROM memory_turns
+                WHERE namespace = ? AND user_id = ? AND archived = 0 ORDER BY id""",
+                (self.namespace, user_id)
+            ).fetchall()
+            stale, archived = [], []
+            for id, _, has_vector in rows[:folded_count([text for _, text, _ in rows], turns)]:
+                (archived if has_vector else stale).append((id,))
+            self.conn.executemany("UPDATE memory_turns SET archived = 1 WHERE id = ?", archived)
+            archive = self.conn.execute(
+                "SELECT id, text FROM memory_turns WHERE namespace = ? AND user_id = ? AND archived = 1 ORDER BY id",
+                (self.namespace, user_id)
+            ).fetchall()
+            kept = cap_turns([text for _, text in archive], self.archive_turns, self.max_bytes)
+            stale += [(id,) for id, _ in archive[:len(archive) - len(kept)]]
+            self.conn.executemany("DELETE FROM memory_turns WHERE id = ?", stale)
+            self.conn.execute(
+                "UPDATE memory_users SET summary = ? WHERE namespace = ? AND user_id = ?", (summary, self.namespace, user_id)
+            )
+            self._resize(user_id)
+            return True
+
+    def clear(self, user_id: str):
+        with self.lock, self.conn:
+            self._delete_users([user_id])
+
+    def stats(self) -> dict:
+        with self.lock:
+            users, size = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM memory_users WHERE namespace = ?", (self.namespace,)
+            ).fetchone()
+            turns, archived = self.conn.execute(
+                "SELECT COUNT(*) - COALESCE(SUM(archived), 0), COALESCE(SUM(archived), 0) FROM memory_turns WHERE namespace = ?",
+                (self.namespace,)
+            ).fetchone()
+            summaries = self.conn.execute(
+                "SELECT COUNT(*) FROM memory_users WHERE namespace = ? AND summary != ''", (self.namespace,)
+            ).fetchone()[0]
+            return {
+                "backend": "sqlite",
+                "users": users,
+                "turns": turns,
+                "archived_turns": archived,
+                "summaries": summaries,
+                "bytes": size,
+                "max_users": self.max_users,
+                "max_bytes_per_user": self.max_bytes,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "dropped_turns": self.dropped_turns
+            }
+
+def create_memory_store(namespace: str = ""):
+    """The store configured by the MEMORY_* settings: SQLite if MEMORY_STORE_PATH is set, in-process otherwise"""
+    if MEMORY_STORE_PATH:
+        return SQLiteMemoryStore(MEMORY_STORE_PATH, namespace)
+    return MemoryStore()
+
+class MemorySummarizer:
+    """Folds older turns into a running summary on a background thread.
+
+    maybe_compact() is called after a turn is saved and returns at once.
+    When the user has more than threshold turns, a job asks the LLM to merge
+    all but the last recent turns into the summary; the request path only
+    ever reads the result. One job per user runs at a time, and a job whose
+    summary changed underneath it (another worker folded first) is dropped.
+    """
+
+    def __init__(self, store, llm, threshold: int = MEMORY_SUMMARY_THRESHOLD, recent: int = MEMORY_RECENT_TURNS,
+                 words: int = MEMORY_SUMMARY_WORDS):
+        self.store = store
+        self.chain = ChatPromptTemplate.from_template(SUMMARY_PROMPT) | llm | StrOutputParser()
+        self.threshold = threshold
+        self.recent = recent
+        self.words = words
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="memory-summary")
+        self.pending = set()
+        self.lock = threading.Lock()
+        self.compactions = 0
+        self.failures = 0
+        self.conflicts = 0
+
+    def maybe_compact(self, user_id: str):
+        if self.threshold <= 0:
+            return
+        with self.lock:
+            if user_id in self.pending:
+                return
+            self.pending.add(user_id)
+        self.executor.submit(self._compact, user_id)
+
+    def _compact(self, user_id: str):
+        try:
+            summary, turns = self.store.history(user_id)
+            if len(turns) <= self.threshold:
+                return
+            older = turns[:len(turns) - self.recent] if self.recent > 0 else turns
+            updated = self.chain.invoke({
+                "summary": summary or "None yet.",
+                "turns": "\n\n".join(older),
+                "words": self.words
+            }).strip()
+            if self.store.fold(user_id, summary, older, updated):
+                with self.lock:
+                    self.compactions += 1
+            else:
+                with self.lock:
+                    self.conflicts += 1
+        except Exception as e:
+            print(f"Memory summary for {user_id} failed: {e}")
+            with self.lock:
+                self.failures += 1
+        finally:
+            with self.lock:
+                self.pending.discard(user_id)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "threshold": self.threshold,
+                "recent_turns": self.recent,
+                "compactions": self.compactions,
+                "conflicts": self.conflicts,
+                "failures": self.failures,
+                "pending": len(self.pending)
+            }
+
+def memory_block(summary: str, turns: List[str]) -> List[str]:
+    """What goes into a prompt: the summary, if any, followed by the recent turns"""
+    return ([f"Summary of earlier interactions: {summary}"] if summary else []) + turns
+
+def recall_memory(summary: str, turns: List[str], vectors: List[Optional[np.ndarray]], embedding: Sequence[float],
+                  archive: Sequence[Tuple[str, np.ndarray]] = (), k: int = MEMORY_RECALL_K, recent: int = MEMORY_RECALL_RECENT,
+                  max_tokens: int = MEMORY_RECALL_TOKENS) -> List[str]:
+    """The memory block for a question: the summary, the latest turns and the
+    k earlier turns whose questions are most similar to it, in conversation order.
+
+    The k are chosen from the turns before the latest ones and from the
+    archive of turns already folded into the summary, so a detail the
+    summary left out can come back word for word; once a summary exists
+    there are only MEMORY_RECENT_TURNS turns left, and without the archive
+    there would be next to nothing to choose from. embedding is the
+    question vector retrieval already computed, so recall makes no
+    embedding call. Turns are taken in that priority order until max_tokens
+    is reached, and the first one that does not fit is cut to the tokens
+    left, so a long latest answer still comes through; turns saved without
+    a vector rank last.
+    """
+    counter = get_token_counter()
+    budget = max_tokens - (counter.count(summary) if summary else 0)
+    turns = [text for text, _ in archive] + list(turns)
+    vectors = [vector for _, vector in archive] + list(vectors)
+    latest = list(range(len(turns) - 1, max(len(turns) - recent, 0) - 1, -1))
+    older = range(len(turns) - len(latest))
+    query = unit_vector(embedding)
+    scores = {i: float(vectors[i] @ query) if vectors[i] is not None else -2.0 for i in older}
+    ranked = sorted(older, key=lambda i: (scores[i], i), reverse=True)[:max(k, 0)]
+    chosen, truncated = {}, False
+    for i in latest + ranked:
+        text = turns[i]
+        tokens = counter.count(text)
+        if tokens > budget:
+            if truncated:
+                continue
+            text = counter.truncate(text, budget)
+            truncated = True
+            if not text:
+                continue
+            tokens = counter.count(text)
+        chosen[i] = text
+        budget -= tokens
+    return memory_block(summary, [chosen[i] for i in sorted(chosen)])
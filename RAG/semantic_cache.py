@@ -0,0 +1,108 @@
+from collections import OrderedDict
+from typing import List, Optional, Sequence
+from langchain_core.documents import Document
+import hashlib
+import itertools
+import os
+import threading
+import time
+import numpy as np
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Minimum cosine similarity between two questions for one to reuse the
+# other's answer, how long an answer is reused, and how many are kept
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+SEMANTIC_CACHE_TTL = float(os.getenv("SEMANTIC_CACHE_TTL", "86400"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "1000"))
+
+def document_ids(docs: List[Document]) -> List[str]:
+    """Qdrant point ids of retrieved documents, or a hash of the text when there is none"""
+    return [
+        str(doc.metadata.get("_id") or hashlib.sha256(doc.page_content.encode("utf-8")).hexdigest())
+        for doc in docs
+    ]
+
+def case_set_key(ids: Sequence[str]) -> str:
+    """Order-independent key of a set of retrieved documents"""
+    return hashlib.sha256("\0".join(sorted(set(ids))).encode("utf-8")).hexdigest()
+
+class SemanticCache:
+    """Answers reused for questions that mean the same thing.
+
+    An answer is returned for a new question when the cosine similarity of
+    the two question embeddings is at least threshold and retrieval found
+    the same set of cases for both, so the answer rests on the same context.
+    Entries are grouped by case set, which keeps each lookup to a handful of
+    vector comparisons, and evicted by TTL and least recent use.
+    """
+
+    def __init__(self, threshold: float = SEMANTIC_CACHE_THRESHOLD, ttl: float = SEMANTIC_CACHE_TTL, max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # entry id -> (case set key, unit question vector, answer, expires_at)
+        self.entries = OrderedDict()
+        # case set key -> ids of the entries for that case set
+        self.buckets = {}
+        self.ids = itertools.count()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _remove(self, entry_id: int):
+        case_key = self.entries.pop(entry_id)[0]
+        bucket = self.buckets[case_key]
+        bucket.remove(entry_id)
+        if not bucket:
+            del self.buckets[case_key]
+
+    def get(self, embedding: List[float], ids: Sequence[str]) -> Optional[str]:
+        case_key = case_set_key(ids)
+        query = np.asarray(embedding, dtype=np.float32)
+        query /= np.linalg.norm(query) or 1.0
+        now = time.time()
+        with self.lock:
+            best_id, best_score = None, self.threshold
+            for entry_id in list(self.buckets.get(case_key, ())):
+                _, vector, _, expires_at = self.entries[entry_id]
+                if expires_at < now:
+                    self._remove(entry_id)
+                    continue
+                score = float(np.dot(query, vector))
+                if score >= best_score:
+                    best_id, best_score = entry_id, score
+            if best_id is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(best_id)
+            self.hits += 1
+            return self.entries[best_id][2]
+
+    def put(self, embedding: List[float], ids: Sequence[str], answer: str):
+        case_key = case_set_key(ids)
+        vector = np.asarray(embedding, dtype=np.float32)
+        vector /= np.linalg.norm(vector) or 1.0
+        with self.lock:
+            entry_id = next(self.ids)
+            self.entries[entry_id] = (case_key, vector, answer, time.time() + self.ttl)
+            self.buckets.setdefault(case_key, []).append(entry_id)
+            while len(self.entries) > self.max_entries:
+                self._remove(next(iter(self.entries)))
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "evictions": self.evictions
+            }
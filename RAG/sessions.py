@@ -0,0 +1,110 @@
+from collections import OrderedDict
+from typing import Optional
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# How long a saved query can be picked up, and how many are kept in process
+SESSION_TTL = float(os.getenv("SESSION_TTL", "3600"))
+SESSION_MAX_ENTRIES = int(os.getenv("SESSION_MAX_ENTRIES", "10000"))
+
+# Optional SQLite file shared by all workers on a host; without it a
+# session is only visible to the process that created it
+SESSION_STORE_PATH = os.getenv("SESSION_STORE_PATH", "")
+
+def new_session_id() -> str:
+    return secrets.token_urlsafe(16)
+
+class SessionStore:
+    """Saved queries by session id, expiring after ttl seconds, kept in this process"""
+
+    def __init__(self, ttl: float = SESSION_TTL, max_entries: int = SESSION_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # session id -> (data, expires_at)
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.evictions = 0
+
+    def put(self, session_id: str, data: dict):
+        now = time.time()
+        with self.lock:
+            self.entries.pop(session_id, None)
+            self.entries[session_id] = (data, now + self.ttl)
+            # Entries are in insertion order and share one ttl, so the oldest expire first
+            while self.entries:
+                oldest, (_, expires_at) = next(iter(self.entries.items()))
+                if len(self.entries) <= self.max_entries and expires_at > now:
+                    break
+                del self.entries[oldest]
+                self.evictions += 1
+
+    def get(self, session_id: str) -> Optional[dict]:
+        with self.lock:
+            entry = self.entries.get(session_id)
+            if entry is None or entry[1] <= time.time():
+                return None
+            return entry[0]
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {"backend": "memory", "sessions": len(self.entries), "ttl": self.ttl, "evictions": self.evictions}
+
+class SQLiteSessionStore:
+    """SessionStore in a SQLite file, so any worker can serve any session"""
+
+    def __init__(self, path: str, namespace: str = "", ttl: float = SESSION_TTL):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.evictions = 0
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self.lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                """CREATE TABLE IF NOT EXISTS sessions (
+                    namespace TEXT NOT NULL,
+                    id TEXT NOT NULL,
+                    data TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, id)
+                )"""
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS sessions_expires ON sessions (expires_at)")
+
+    def put(self, session_id: str, data: dict):
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO sessions (namespace, id, data, expires_at) VALUES (?, ?, ?, ?)",
+                (self.namespace, session_id, json.dumps(data, ensure_ascii=False), now + self.ttl)
+            )
+            self.evictions += self.conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,)).rowcount
+
+    def get(self, session_id: str) -> Optional[dict]:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT data FROM sessions WHERE namespace = ? AND id = ? AND expires_at > ?",
+                (self.namespace, session_id, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def stats(self) -> dict:
+        with self.lock:
+            sessions = self.conn.execute(
+                "SELECT COUNT(*) FROM sessions WHERE namespace = ? AND expires_at > ?", (self.namespace, time.time())
+            ).fetchone()[0]
+        return {"backend": "sqlite", "sessions": sessions, "ttl": self.ttl, "evictions": self.evictions}
+
+def create_session_store(namespace: str = ""):
+    """The store configured by the SESSION_* settings: SQLite if SESSION_STORE_PATH is set, in-process otherwise"""
+    if SESSION_STORE_PATH:
+        return SQLiteSessionStore(SESSION_STORE_PATH, namespace)
+    return SessionStore()
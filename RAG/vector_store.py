@@ -1,8 +1,12 @@
 from langchain_community.vectorstores import Qdrant
 from qdrant_client import QdrantClient
-from qdrant_client.http.models import Distance, VectorParams
 from langchain_openai import OpenAIEmbeddings
+from embedding_cache import cached_embeddings, EMBEDDING_MODEL
+from local_index import LocalVectorStore
+from bm25_index import BM25Index
+from hybrid_search import HybridRetriever
 import os
+import threading
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -13,25 +17,63 @@ QDRANT_URL = os.getenv("QDRANT_URL")
 QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
-if not all([QDRANT_URL, QDRANT_API_KEY, OPENAI_API_KEY]):
+# Where retrieval happens: "qdrant" (remote server), "numpy" (exact search
+# over a local index) or "hnsw" (approximate search over the same local
+# index, needs hnswlib). The local backends keep their files in LOCAL_INDEX_DIR.
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "qdrant")
+LOCAL_INDEX_DIR = os.getenv("LOCAL_INDEX_DIR", "vector_index")
+
+# BM25 keyword index over the same chunks, written by ingest.py; retrieval
+# falls back to vector search alone while it is empty
+BM25_INDEX_DIR = os.getenv("BM25_INDEX_DIR", "bm25_index")
+COLLECTION_NAME = "my_documents"
+
+if VECTOR_BACKEND not in ("qdrant", "numpy", "hnsw"):
+    raise ValueError(f"Unknown VECTOR_BACKEND: {VECTOR_BACKEND}")
+
+if not OPENAI_API_KEY or (VECTOR_BACKEND == "qdrant" and not all([QDRANT_URL, QDRANT_API_KEY])):
     raise ValueError("Required environment variables are not set")
 
-# Initialize OpenAI embeddings with a model that produces 768-dimensional vectors
-embeddings = OpenAIEmbeddings(model="text-embedding-ada-002")
+# Initialize OpenAI embeddings with a model that produces 768-dimensional vectors,
+# behind a cache so repeated queries and unchanged chunks are not embedded again
+embeddings = cached_embeddings(OpenAIEmbeddings(model=EMBEDDING_MODEL), EMBEDDING_MODEL)
 
-# Initialize Qdrant client
-client = QdrantClient(
-    url=QDRANT_URL,
-    api_key=QDRANT_API_KEY
-)
+vectorstore = None
+retriever = None
+_lock = threading.Lock()
 
-# Initialize vector store
-vectorstore = Qdrant(
-    client=client,
-    collection_name="my_documents",
-    embeddings=embeddings,
-)
+def create_vectorstore(backend: str = VECTOR_BACKEND):
+    """Build the vector store for a backend; all of them share the same search interface"""
+    if backend == "qdrant":
+        client = QdrantClient(
+            url=QDRANT_URL,
+            api_key=QDRANT_API_KEY
+        )
+        return Qdrant(
+            client=client,
+            collection_name=COLLECTION_NAME,
+            embeddings=embeddings,
+        )
+    # The local index is only read from disk on the first search
+    return LocalVectorStore(LOCAL_INDEX_DIR, embeddings, ann=backend == "hnsw")
 
 def get_vectorstore():
-    """Get the initialized vector store instance"""
-    return vectorstore 
\ No newline at end of file
+    """Get the vector store instance, creating it on first use"""
+    global vectorstore
+    with _lock:
+        if vectorstore is None:
+            vectorstore = create_vectorstore()
+        return vectorstore
+
+def get_embeddings():
+    """Get the cached embeddings used by the vector store"""
+    return embeddings 
+
+def get_retriever():
+    """Get the hybrid (vector + BM25) retriever, creating it on first use"""
+    global retriever
+    store = get_vectorstore()
+    with _lock:
+        if retriever is None:
+            retriever = HybridRetriever(store, BM25Index(BM25_INDEX_DIR))
+        return retriever
\ No newline at end of file
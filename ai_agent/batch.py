@@ -0,0 +1,79 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+import io
+import json
+import os
+import traceback
+import zipfile
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Batch documents drafted at the same time across all batches, and the largest batch accepted
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "500"))
+
+# One pool for every batch, so concurrent batches share BATCH_CONCURRENCY
+# workers instead of each starting its own
+batch_executor = ThreadPoolExecutor(max_workers=BATCH_CONCURRENCY, thread_name_prefix="batch")
+
+def run_batch(agent, items: List[dict]) -> List[dict]:
+    """Generate a document for every item, isolating per-item failures.
+
+    Each item is a dict with user_input, user_name, location and
+    contact_number. All items are classified first (cached cases are
+    skipped, the rest go out in grouped LLM calls) and then drafted on the
+    pool of BATCH_CONCURRENCY workers shared by all batches. Returns one result dict per
+    item, in input order; successful results carry the PDF bytes under "pdf".
+    """
+    results = [{"index": i, "status": "pending"} for i in range(len(items))]
+
+    prepared = [
+        agent.prepare_input(item["user_input"], item["user_name"], item["location"], item["contact_number"])
+        for item in items
+    ]
+    document_types = agent.classify_many(prepared)
+
+    def draft(index: int):
+        item = items[index]
+        result = results[index]
+        result["document_type"] = document_types[index]
+        try:
+            document = agent.generate(
+                user_input=item["user_input"],
+                user_name=item["user_name"],
+                location=item["location"],
+                contact_number=item["contact_number"],
+                document_type=document_types[index],
+                use_cache=item.get("use_cache", True)
+            )
+            result["pdf"] = document.pdf
+            result["filename"] = document.filename
+            result["status"] = "success"
+        except Exception as e:
+            print(f"Batch item {index} failed: {str(e)}")
+            print(traceback.format_exc())
+            result["status"] = "error"
+            result["error"] = str(e)
+
+    list(batch_executor.map(draft, range(len(items))))
+
+    return results
+
+def build_manifest(results: List[dict]) -> List[dict]:
+    """Per-item results without the PDF bytes"""
+    return [{key: value for key, value in result.items() if key != "pdf"} for result in results]
+
+def build_zip(results: List[dict]) -> bytes:
+    """Pack every generated PDF plus a manifest.json into one ZIP archive"""
+    manifest = build_manifest(results)
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for result, entry in zip(results, manifest):
+            if result["status"] == "success":
+                # Prefix with the item index so documents for the same name do not collide
+                entry["filename"] = f"{result['index']:04d}_{result['filename']}"
+                archive.writestr(entry["filename"], result["pdf"])
+        archive.writestr("manifest.json", json.dumps(manifest, indent=2))
+    return buffer.getvalue()
@@ -0,0 +1,170 @@
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+import pickle
+import sqlite3
+import threading
+import time
+
+class LRUCache:
+    """Thread-safe in-memory LRU cache with TTL.
+
+    max_size is measured with size_of (one unit per entry by default), so the
+    same class can bound either the number of entries or their total bytes.
+    """
+
+    def __init__(self, max_size: int, ttl: float, size_of: Callable[[Any], int] = lambda value: 1):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.size_of = size_of
+        self.entries = OrderedDict()
+        self.size = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, size, expires_at = entry
+            if expires_at < time.time():
+                del self.entries[key]
+                self.size -= size
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: Any):
+        size = self.size_of(value)
+        if size > self.max_size:
+            return
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.size -= old[1]
+            self.entries[key] = (value, size, time.time() + self.ttl)
+            self.size += size
+            while self.size > self.max_size:
+                _, (_, evicted_size, _) = self.entries.popitem(last=False)
+                self.size -= evicted_size
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {"entries": len(self.entries), "size": self.size, "max_size": self.max_size, "evictions": self.evictions}
+
+class SQLiteCache:
+    """On-disk cache tier in a local SQLite file, with TTL and size-based eviction.
+
+    Values are pickled, so the file must only ever be written by this service.
+    """
+
+    def __init__(self, path: str, max_size: int, ttl: float, size_of: Callable[[Any], int] = lambda value: 1):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.size_of = size_of
+        self.evictions = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                """CREATE TABLE IF NOT EXISTS cache (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )"""
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed_at)")
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self.lock, self.conn:
+            row = self.conn.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                self.conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                return None
+            self.conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+        return pickle.loads(row[0])
+
+    def put(self, key: str, value: Any):
+        size = self.size_of(value)
+        if size > self.max_size:
+            return
+        now = time.time()
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, blob, size, now + self.ttl, now)
+            )
+            self._evict(now)
+
+    def _evict(self, now: float):
+        cursor = self.conn.execute("DELETE FROM cache WHERE expires_at < ?", (now,))
+        self.evictions += cursor.rowcount
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+        if total <= self.max_size:
+            return
+        # Drop least recently used entries until the cache fits again
+        for key, size in self.conn.execute("SELECT key, size FROM cache ORDER BY accessed_at").fetchall():
+            self.conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self.evictions += 1
+            total -= size
+            if total <= self.max_size:
+                break
+
+    def stats(self) -> dict:
+        with self.lock:
+            entries, size = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache").fetchone()
+        return {"entries": entries, "size": size, "max_size": self.max_size, "evictions": self.evictions}
+
+class TieredCache:
+    """In-memory LRU in front of an optional on-disk tier, with hit/miss counters"""
+
+    def __init__(self, memory: LRUCache, disk: Optional[SQLiteCache] = None):
+        self.memory = memory
+        self.disk = disk
+        self.lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.memory.get(key)
+        if value is not None:
+            with self.lock:
+                self.memory_hits += 1
+            return value
+        if self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.put(key, value)
+                with self.lock:
+                    self.disk_hits += 1
+                return value
+        with self.lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, value: Any):
+        self.memory.put(key, value)
+        if self.disk is not None:
+            self.disk.put(key, value)
+
+    def stats(self) -> dict:
+        with self.lock:
+            stats = {
+                "hits": self.memory_hits + self.disk_hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses
+            }
+        stats["memory"] = self.memory.stats()
+        if self.disk is not None:
+            stats["disk"] = self.disk.stats()
+        return stats
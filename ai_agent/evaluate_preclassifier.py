@@ -0,0 +1,74 @@
+"""Offline evaluation of the local pre-classifier against logged LLM decisions.
+
+Reads the JSON lines written to CLASSIFICATION_LOG_PATH (logged with
+CLASSIFICATION_LOG_INPUTS=true, so the inputs are there to re-classify),
+treats every decision made by the LLM as ground truth and reports, for a range of
+thresholds, how many cases the pre-classifier would answer on its own, how
+accurate those answers are, and how long a local classification takes.
+
+Usage:
+    python evaluate_preclassifier.py [--log classification_log.jsonl] [--thresholds 0.5 0.7 0.85 0.95]
+"""
+import argparse
+import json
+import statistics
+import time
+from preclassifier import preclassify, CLASSIFICATION_LOG_PATH, PRECLASSIFIER_THRESHOLD
+
+def load_decisions(path: str):
+    decisions = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record.get("source") == "llm" and "input" in record:
+                decisions.append((record["input"], record["document_type"]))
+    return decisions
+
+def evaluate(decisions, thresholds):
+    predictions = []
+    latencies = []
+    for text, _ in decisions:
+        start = time.perf_counter()
+        predictions.append(preclassify(text))
+        latencies.append((time.perf_counter() - start) * 1e6)
+
+    total = len(decisions)
+    print(f"Logged LLM decisions: {total}")
+    print(f"Latency per classification: p50 {statistics.median(latencies):.1f} us, "
+          f"p95 {sorted(latencies)[int(0.95 * (total - 1))]:.1f} us, max {max(latencies):.1f} us")
+    print()
+    print(f"{'threshold':>9}  {'coverage':>8}  {'accuracy':>8}  {'errors':>6}")
+    for threshold in thresholds:
+        answered = [
+            (predicted, expected)
+            for (predicted, confidence), (_, expected) in zip(predictions, decisions)
+            if predicted is not None and confidence >= threshold
+        ]
+        correct = sum(1 for predicted, expected in answered if predicted == expected)
+        coverage = len(answered) / total
+        accuracy = correct / len(answered) if answered else float("nan")
+        marker = "  <- current" if threshold == PRECLASSIFIER_THRESHOLD else ""
+        print(f"{threshold:>9.2f}  {coverage:>8.1%}  {accuracy:>8.1%}  {len(answered) - correct:>6}{marker}")
+
+    # Accuracy if the local label were used for everything, as a reference point
+    overall = sum(1 for (predicted, _), (_, expected) in zip(predictions, decisions) if predicted == expected)
+    print()
+    print(f"Accuracy of the local label on all cases: {overall / total:.1%}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--log", default=CLASSIFICATION_LOG_PATH or "classification_log.jsonl", help="classification log to evaluate against")
+    parser.add_argument("--thresholds", type=float, nargs="+",
+                        default=sorted({0.5, 0.7, 0.8, 0.9, 0.95, PRECLASSIFIER_THRESHOLD}))
+    args = parser.parse_args()
+
+    decisions = load_decisions(args.log)
+    if not decisions:
+        print(f"No LLM decisions with logged inputs found in {args.log}")
+        return
+    evaluate(decisions, args.thresholds)
+
+if __name__ == "__main__":
+    main()
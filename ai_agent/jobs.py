@@ -0,0 +1,169 @@
+from typing import Callable, Optional
+import json
+import os
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Jobs live in a local SQLite file so queued and interrupted jobs survive a restart
+JOBS_DB_PATH = os.getenv("JOBS_DB_PATH", "jobs.db")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_QUEUE_LIMIT = int(os.getenv("JOB_QUEUE_LIMIT", "1000"))
+
+class JobStore:
+    """SQLite-backed store of document generation jobs and their progress"""
+
+    def __init__(self, path: str = JOBS_DB_PATH):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        with self.lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                """CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    request TEXT NOT NULL,
+                    stages TEXT NOT NULL DEFAULT '{}',
+                    result_path TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )"""
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+
+    def create(self, request: dict) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO jobs (id, status, request, created_at, updated_at) VALUES (?, 'queued', ?, ?, ?)",
+                (job_id, json.dumps(request), now, now)
+            )
+        return job_id
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self.lock:
+            row = self.conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {
+            "job_id": row["id"],
+            "status": row["status"],
+            "stages": json.loads(row["stages"]),
+            "error": row["error"],
+            "result_path": row["result_path"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"]
+        }
+
+    def count(self, status: str) -> int:
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (status,)).fetchone()[0]
+
+    def claim_next(self) -> Optional[tuple]:
+        """Mark the oldest queued job as running and return (id, request)"""
+        with self.lock, self.conn:
+            row = self.conn.execute(
+                "SELECT id, request FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            self.conn.execute(
+                "UPDATE jobs SET status = 'running', updated_at = ? WHERE id = ?",
+                (time.time(), row["id"])
+            )
+        return row["id"], json.loads(row["request"])
+
+    def update_stage(self, job_id: str, stage: str, state: str):
+        with self.lock, self.conn:
+            row = self.conn.execute("SELECT stages FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return
+            stages = json.loads(row["stages"])
+            stages[stage] = state
+            self.conn.execute(
+                "UPDATE jobs SET stages = ?, updated_at = ? WHERE id = ?",
+                (json.dumps(stages), time.time(), job_id)
+            )
+
+    def finish(self, job_id: str, result_path: str):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "UPDATE jobs SET status = 'done', result_path = ?, updated_at = ? WHERE id = ?",
+                (result_path, time.time(), job_id)
+            )
+
+    def fail(self, job_id: str, error: str):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, updated_at = ? WHERE id = ?",
+                (error, time.time(), job_id)
+            )
+
+    def requeue_interrupted(self) -> int:
+        """Put jobs that were running when the process stopped back in the queue"""
+        with self.lock, self.conn:
+            cursor = self.conn.execute(
+                "UPDATE jobs SET status = 'queued', stages = '{}', updated_at = ? WHERE status = 'running'",
+                (time.time(),)
+            )
+        return cursor.rowcount
+
+class JobRunner:
+    """Background worker threads that drain the job queue.
+
+    handler(request, progress) does the actual work and returns the path of
+    the generated file; progress(stage, state) is recorded on the job.
+    """
+
+    def __init__(self, store: JobStore, handler: Callable[[dict, Callable[[str, str], None]], str], workers: int = JOB_WORKERS):
+        self.store = store
+        self.handler = handler
+        self.workers = workers
+        self.wakeup = threading.Condition()
+        self.threads = []
+
+    def start(self):
+        if self.threads:
+            return
+        requeued = self.store.requeue_interrupted()
+        if requeued:
+            print(f"Requeued {requeued} interrupted job(s)")
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def submit(self, request: dict) -> str:
+        job_id = self.store.create(request)
+        with self.wakeup:
+            self.wakeup.notify()
+        return job_id
+
+    def _work(self):
+        while True:
+            claimed = self.store.claim_next()
+            if claimed is None:
+                with self.wakeup:
+                    # Poll now and then as well, in case a notify was missed
+                    self.wakeup.wait(timeout=1.0)
+                continue
+            job_id, request = claimed
+            try:
+                result_path = self.handler(
+                    request,
+                    lambda stage, state: self.store.update_stage(job_id, stage, state)
+                )
+                self.store.finish(job_id, result_path)
+            except Exception as e:
+                print(f"Job {job_id} failed: {str(e)}")
+                print(traceback.format_exc())
+                self.store.fail(job_id, str(e))
@@ -1,20 +1,30 @@
 from langchain.agents import Tool, AgentExecutor, LLMSingleActionAgent
 from langchain.prompts import StringPromptTemplate
-from langchain_openai import ChatOpenAI
 
 from langchain.schema import AgentAction, AgentFinish, HumanMessage
 from langchain.chains import LLMChain
 from langchain.agents.output_parsers import ReActSingleInputOutputParser
-from typing import List, Union, Tuple, Dict, Any
+from typing import List, Union, Tuple, Optional
 import re
 import os
+import hashlib
+import json
 from dotenv import load_dotenv
-from legal_tools import PILTool, RTITool, ComplaintTool, LegalDocumentInput
-from langdetect import detect
+from legal_tools import GeneratedDocument, ProgressCallback, report_progress
+from storage import document_store
+from langdetect import detect, DetectorFactory
+from translation import get_translation_service
+from registry import get_llm, get_tool
+from cache import LRUCache, SQLiteCache, TieredCache
+from preclassifier import preclassify, log_decision, PRECLASSIFIER_THRESHOLD
 
 # Load environment variables
 load_dotenv()
 
+# langdetect is randomised by default; pin it so the same input always gets
+# the same language (and so the same document cache key)
+DetectorFactory.seed = 0
+
 class CustomOutputParser(ReActSingleInputOutputParser):
     def parse(self, text: str) -> Union[AgentAction, AgentFinish]:
         # Try to extract thought and action using regex
@@ -65,19 +75,84 @@ Remember to always include both "Thought:" and "Action:" in your response."""
     def format(self, **kwargs) -> str:
         return self.template.format(**kwargs)
 
+# Shared by the single and the batch classification prompts
+CLASSIFICATION_CRITERIA = """PIL (Public Interest Litigation):
+- Involves constitutional rights or fundamental rights
+- Affects public interest or public welfare
+- Concerns governance, policy, or public administration
+- Has broader implications for society
+- Involves environmental protection, public health, or public safety
+- Challenges government actions or policies
+- Involves interpretation of constitutional provisions
+- Affects a large number of people or public at large
+- Requires judicial intervention for proper governance
+
+RTI (Right to Information):
+- Primarily about requesting specific information from public authorities
+- Seeks access to documents, records, or data
+- Concerns transparency and accountability
+- Based on Right to Information Act, 2005
+- Focuses on obtaining information rather than challenging actions
+- Individual or specific information requests
+- No broader public interest implications
+
+Consumer Complaint:
+- Involves defective products or deficient services
+- Concerns individual consumer grievances
+- Based on Consumer Protection Act
+- Involves refund, replacement, or compensation claims
+- Concerns specific business transactions
+- Individual or specific business disputes
+- No broader public interest implications"""
+
+# Number of cases classified together in one batch classification call
+CLASSIFICATION_BATCH_SIZE = int(os.getenv("CLASSIFICATION_BATCH_SIZE", "20"))
+
+# Classification cache: entries kept in memory, seconds an answer stays valid,
+# and an optional SQLite file (with its own entry limit) shared across restarts
+CLASSIFICATION_CACHE_SIZE = int(os.getenv("CLASSIFICATION_CACHE_SIZE", "1024"))
+CLASSIFICATION_CACHE_TTL = float(os.getenv("CLASSIFICATION_CACHE_TTL", "86400"))
+CLASSIFICATION_CACHE_PATH = os.getenv("CLASSIFICATION_CACHE_PATH", "")
+CLASSIFICATION_CACHE_DISK_SIZE = int(os.getenv("CLASSIFICATION_CACHE_DISK_SIZE", "100000"))
+
+def classification_cache_key(user_issue: str, insights: str) -> str:
+    """Hash of the issue and insights, ignoring case and whitespace differences"""
+    normalized = "\0".join(" ".join(part.casefold().split()) for part in (user_issue, insights))
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+# Finished documents, bounded by the bytes of PDF and text they hold: memory
+# budget, seconds a document is reused, and an optional SQLite tier
+DOCUMENT_CACHE_BYTES = int(os.getenv("DOCUMENT_CACHE_BYTES", str(64 * 1024 * 1024)))
+DOCUMENT_CACHE_TTL = float(os.getenv("DOCUMENT_CACHE_TTL", "3600"))
+DOCUMENT_CACHE_PATH = os.getenv("DOCUMENT_CACHE_PATH", "")
+DOCUMENT_CACHE_DISK_BYTES = int(os.getenv("DOCUMENT_CACHE_DISK_BYTES", str(1024 * 1024 * 1024)))
+
+def document_cache_key(user_input: str, user_name: str, location: str, contact_number: str, language: str, document_type: str) -> str:
+    """Hash of every input that shapes a generated document"""
+    fields = [user_input, user_name, location, contact_number, language, document_type.upper()]
+    canonical = json.dumps([(field or "").strip() for field in fields], ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+def document_size(document: GeneratedDocument) -> int:
+    return len(document.pdf) + len(document.content.encode("utf-8"))
+
 class LegalDocumentAgent:
     def __init__(self):
-        self.llm = ChatOpenAI(
-            temperature=0.3,
-            model="gpt-4o-mini",
-            api_key=os.getenv("OPENAI_API_KEY")
+        self.llm = get_llm()
+        self.classification_cache = TieredCache(
+            LRUCache(CLASSIFICATION_CACHE_SIZE, CLASSIFICATION_CACHE_TTL),
+            SQLiteCache(CLASSIFICATION_CACHE_PATH, CLASSIFICATION_CACHE_DISK_SIZE, CLASSIFICATION_CACHE_TTL) if CLASSIFICATION_CACHE_PATH else None
+        )
+        self.document_cache = TieredCache(
+            LRUCache(DOCUMENT_CACHE_BYTES, DOCUMENT_CACHE_TTL, size_of=document_size),
+            SQLiteCache(DOCUMENT_CACHE_PATH, DOCUMENT_CACHE_DISK_BYTES, DOCUMENT_CACHE_TTL, size_of=document_size) if DOCUMENT_CACHE_PATH else None
         )
         
         # Initialize tools
         self.tools = [
             Tool(
                 name="PIL",
-                func=lambda x: PILTool()._run(
+                func=lambda x: get_tool("PIL")._run(
                     user_issue=x.split("User Issue: ")[1].split("\nLegal Insights:")[0],
                     insights=x.split("Legal Insights: ")[1].split("\nUser Name:")[0],
                     user_name=x.split("User Name: ")[1].split("\nLocation:")[0],
@@ -88,7 +163,7 @@ class LegalDocumentAgent:
             ),
             Tool(
                 name="RTI",
-                func=lambda x: RTITool()._run(
+                func=lambda x: get_tool("RTI")._run(
                     user_issue=x.split("User Issue: ")[1].split("\nLegal Insights:")[0],
                     insights=x.split("Legal Insights: ")[1].split("\nUser Name:")[0],
                     user_name=x.split("User Name: ")[1].split("\nLocation:")[0],
@@ -99,7 +174,7 @@ class LegalDocumentAgent:
             ),
             Tool(
                 name="Complaint",
-                func=lambda x: ComplaintTool()._run(
+                func=lambda x: get_tool("COMPLAINT")._run(
                     user_issue=x.split("User Issue: ")[1].split("\nLegal Insights:")[0],
                     insights=x.split("Legal Insights: ")[1].split("\nUser Name:")[0],
                     user_name=x.split("User Name: ")[1].split("\nLocation:")[0],
@@ -144,44 +219,14 @@ class LegalDocumentAgent:
             return "en"
 
     def translate_text(self, text: str, target_language: str) -> str:
-        if target_language == "hi":
-            prompt = f"Translate the following legal document to Hindi, keeping all formatting and legal terminology:\n\n{text}\n\nHindi:"
-            return self.llm([HumanMessage(content=prompt)]).content.strip()
-        return text
+        return get_translation_service().translate_text(text, target_language)
 
     def classify_document(self, user_input: str) -> str:
         classification_prompt = f"""You are a legal expert tasked with classifying a legal case into one of three categories: PIL (Public Interest Litigation), RTI (Right to Information), or Complaint.
 
 Consider the following criteria:
 
-PIL (Public Interest Litigation):
-- Involves constitutional rights or fundamental rights
-- Affects public interest or public welfare
-- Concerns governance, policy, or public administration
-- Has broader implications for society
-- Involves environmental protection, public health, or public safety
-- Challenges government actions or policies
-- Involves interpretation of constitutional provisions
-- Affects a large number of people or public at large
-- Requires judicial intervention for proper governance
-
-RTI (Right to Information):
-- Primarily about requesting specific information from public authorities
-- Seeks access to documents, records, or data
-- Concerns transparency and accountability
-- Based on Right to Information Act, 2005
-- Focuses on obtaining information rather than challenging actions
-- Individual or specific information requests
-- No broader public interest implications
-
-Consumer Complaint:
-- Involves defective products or deficient services
-- Concerns individual consumer grievances
-- Based on Consumer Protection Act
-- Involves refund, replacement, or compensation claims
-- Concerns specific business transactions
-- Individual or specific business disputes
-- No broader public interest implications
+{CLASSIFICATION_CRITERIA}
 
 Case Details:
 {user_input}
@@ -201,38 +246,129 @@ Your response should be based on the PRIMARY purpose of the case, not secondary
         
         # Ensure response is one of the valid categories
         if response not in ["PIL", "RTI", "COMPLAINT"]:
-            # If response is not clear, analyze the main purpose
-            if any(keyword in user_input.lower() for keyword in ["constitutional", "public interest", "environment", "governance", "policy", "public welfare"]):
-                return "PIL"
-            elif any(keyword in user_input.lower() for keyword in ["information", "documents", "records", "transparency"]):
-                return "RTI"
-            else:
-                return "COMPLAINT"
+            return self._fallback_classification(user_input)
         
         return response
 
-    def generate_document(self, user_input: str, user_name: str, location: str, contact_number: str) -> str:
+    def _fallback_classification(self, user_input: str) -> str:
+        # If response is not clear, analyze the main purpose
+        if any(keyword in user_input.lower() for keyword in ["constitutional", "public interest", "environment", "governance", "policy", "public welfare"]):
+            return "PIL"
+        elif any(keyword in user_input.lower() for keyword in ["information", "documents", "records", "transparency"]):
+            return "RTI"
+        else:
+            return "COMPLAINT"
+
+    def classify_documents(self, user_inputs: List[str]) -> List[str]:
+        """Classify many cases with one LLM call per CLASSIFICATION_BATCH_SIZE cases"""
+        document_types = []
+        for start in range(0, len(user_inputs), CLASSIFICATION_BATCH_SIZE):
+            group = user_inputs[start:start + CLASSIFICATION_BATCH_SIZE]
+            cases = "\n\n".join(f"Case {i + 1}:\n{user_input}" for i, user_input in enumerate(group))
+            classification_prompt = f"""You are a legal expert tasked with classifying each of the legal cases below into one of three categories: PIL (Public Interest Litigation), RTI (Right to Information), or Complaint.
+
+Consider the following criteria:
+
+{CLASSIFICATION_CRITERIA}
+
+{cases}
+
+For each case, determine the PRIMARY purpose and nature of the case, not secondary aspects.
+
+Respond with exactly one line per case, in order, in the format:
+Case <number>: <PIL, RTI, or Complaint>"""
+
+            try:
+                response = self.llm([HumanMessage(content=classification_prompt)]).content
+                answers = {
+                    int(number): label.upper()
+                    for number, label in re.findall(r"Case\s+(\d+)\s*:\s*(PIL|RTI|Complaint)", response, re.IGNORECASE)
+                }
+            except Exception as e:
+                print(f"Batch classification failed, using keyword fallback: {str(e)}")
+                answers = {}
+            
+            # Cases the model skipped or garbled fall back to the keyword rules
+            for i, user_input in enumerate(group):
+                document_types.append(answers.get(i + 1) or self._fallback_classification(user_input))
+        return document_types
+
+    def classify(self, user_issue: str, insights: str, full_input: str) -> str:
+        """classify_document, answered locally or from the classification cache when possible"""
+        text = f"{user_issue}\n{insights}"
+        document_type, confidence = preclassify(text)
+        if document_type is not None and confidence >= PRECLASSIFIER_THRESHOLD:
+            log_decision(text, document_type, "local", confidence)
+            return document_type
+        
+        key = classification_cache_key(user_issue, insights)
+        document_type = self.classification_cache.get(key)
+        if document_type is None:
+            document_type = self.classify_document(full_input)
+            self.classification_cache.put(key, document_type)
+            log_decision(text, document_type, "llm")
+        return document_type
+
+    def classify_many(self, prepared: List[Tuple[str, str, str]]) -> List[str]:
+        """classify_documents for (user_issue, insights, full_input) tuples, skipping clear-cut and cached cases"""
+        texts = [f"{user_issue}\n{insights}" for user_issue, insights, _ in prepared]
+        keys = [classification_cache_key(user_issue, insights) for user_issue, insights, _ in prepared]
+        document_types = []
+        for text, key in zip(texts, keys):
+            document_type, confidence = preclassify(text)
+            if document_type is not None and confidence >= PRECLASSIFIER_THRESHOLD:
+                log_decision(text, document_type, "local", confidence)
+                document_types.append(document_type)
+            else:
+                document_types.append(self.classification_cache.get(key))
+        missing = [i for i, document_type in enumerate(document_types) if document_type is None]
+        if missing:
+            classified = self.classify_documents([prepared[i][2] for i in missing])
+            for i, document_type in zip(missing, classified):
+                document_types[i] = document_type
+                self.classification_cache.put(keys[i], document_type)
+                log_decision(texts[i], document_type, "llm")
+        return document_types
+
+    def prepare_input(self, user_input: str, user_name: str, location: str, contact_number: str) -> Tuple[str, str, str]:
+        """Split the user input into issue and insights and build the classification input"""
+        input_parts = user_input.split("\n\n", 1)
+        user_issue = input_parts[0]
+        insights = input_parts[1] if len(input_parts) > 1 else ""
+        full_input = f"User Issue: {user_issue}\nLegal Insights: {insights}\nUser Name: {user_name}\nLocation: {location}\nContact: {contact_number}"
+        return user_issue, insights, full_input
+
+    def generate_document(self, user_input: str, user_name: str, location: str, contact_number: str, progress: ProgressCallback = None, document_type: Optional[str] = None, use_cache: bool = True) -> str:
+        """Generate the document and store the PDF on disk; returns its path"""
+        document = self.generate(user_input, user_name, location, contact_number, progress, document_type, use_cache)
+        return document_store.save(document.filename, document.pdf)
+
+    def generate(self, user_input: str, user_name: str, location: str, contact_number: str, progress: ProgressCallback = None, document_type: Optional[str] = None, use_cache: bool = True) -> GeneratedDocument:
+        """Generate the document entirely in memory, reusing an identical earlier one unless use_cache is False"""
         try:
             language = self.detect_language(user_input)
             # Parse the user input to extract issue and insights
-            input_parts = user_input.split("\n\n", 1)
-            user_issue = input_parts[0]
-            insights = input_parts[1] if len(input_parts) > 1 else ""
+            user_issue, insights, full_input = self.prepare_input(user_input, user_name, location, contact_number)
             
-            # Create the input for classification
-            full_input = f"User Issue: {user_issue}\nLegal Insights: {insights}\nUser Name: {user_name}\nLocation: {location}\nContact: {contact_number}"
+            # First, classify the document unless the caller already did
+            if document_type is None:
+                report_progress(progress, "classification", "running")
+                document_type = self.classify(user_issue, insights, full_input)
+                report_progress(progress, "classification", "done")
             
-            # First, classify the document
-            document_type = self.classify_document(full_input)
+            # Identical submissions (a repeated click, a replayed backend answer)
+            # get the finished document back without drafting or rendering again
+            key = document_cache_key(user_input, user_name, location, contact_number, language, document_type)
+            if use_cache:
+                document = self.document_cache.get(key)
+                if document is not None:
+                    report_progress(progress, "document_cache", "hit")
+                    return document
             
             # Then generate the appropriate document
-            if document_type == "PIL":
-                content_path = PILTool()._run(user_issue, insights, user_name, location, contact_number, language)
-            elif document_type == "RTI":
-                content_path = RTITool()._run(user_issue, insights, user_name, location, contact_number, language)
-            else:
-                content_path = ComplaintTool()._run(user_issue, insights, user_name, location, contact_number, language)
-            return content_path
+            document = get_tool(document_type).generate(user_issue, insights, user_name, location, contact_number, language, progress)
+            self.document_cache.put(key, document)
+            return document
                 
         except Exception as e:
             raise Exception(f"Error generating document: {str(e)}") 
\ No newline at end of file
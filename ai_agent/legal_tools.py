@@ -1,32 +1,36 @@
+from abc import ABC, abstractmethod
 from langchain.tools import BaseTool
 from langchain_openai import ChatOpenAI
 from langchain.schema import HumanMessage
-from jinja2 import Environment, FileSystemLoader
-from reportlab.lib.pagesizes import LETTER
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.units import inch
-from reportlab.lib.enums import TA_JUSTIFY, TA_CENTER
+from jinja2 import Environment
 import os
 from datetime import datetime
-from typing import Optional, Type
+from typing import Optional, Dict, Callable
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+import time
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 import re
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfbase import pdfmetrics
+from translation import get_translation_service
+from registry import get_llm, get_template_env
+from rendering import render_pool
+from storage import document_store
 
 # Load environment variables
 load_dotenv()
 
-# Register Devanagari font for Hindi
-pdfmetrics.registerFont(TTFont('NotoSansDevanagari', 'fonts/NotoSansDevanagari-Regular.ttf'))
+# Section generation settings: how many section prompts of one document may be
+# in flight at once, and how long (seconds) a single section may take
+SECTION_CONCURRENCY = int(os.getenv("SECTION_CONCURRENCY", "5"))
+SECTION_TIMEOUT = float(os.getenv("SECTION_TIMEOUT", "60"))
 
-LANGUAGE_CONFIG = {
-    "en": {"font": "Times-Roman"},
-    "hi": {"font": "NotoSansDevanagari"},
-    # Add more languages as needed
-}
+# Optional callback told about pipeline stages as they run, e.g.
+# progress("section:facts", "done"); used by the job API to report status
+ProgressCallback = Optional[Callable[[str, str], None]]
+
+def report_progress(progress: ProgressCallback, stage: str, state: str):
+    if progress is not None:
+        progress(stage, state)
 
 class LegalDocumentInput(BaseModel):
     user_issue: str = Field(description="The main issue or concern to be addressed in the legal document")
@@ -35,7 +39,14 @@ class LegalDocumentInput(BaseModel):
     location: str = Field(description="Location or jurisdiction where the document is being filed")
     document_type: Optional[str] = Field(description="Type of legal document (PIL, RTI, or Complaint)")
 
-class BaseLegalTool(BaseTool):
+class GeneratedDocument(BaseModel):
+    document_type: str = Field(description="PIL, RTI or Complaint")
+    filename: str = Field(description="Suggested download name of the PDF")
+    language: str
+    content: str = Field(description="Rendered template text the PDF was laid out from")
+    pdf: bytes
+
+class BaseLegalTool(BaseTool, ABC):
     name: str
     description: str
     template_file: str
@@ -44,102 +55,79 @@ class BaseLegalTool(BaseTool):
     
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.llm = ChatOpenAI(
-            temperature=0.3,
-            model="gpt-4o-mini",
-            api_key=os.getenv("OPENAI_API_KEY")
-        )
-        self.env = Environment(loader=FileSystemLoader("templates"))
+        # Clients and compiled templates are shared by every tool in the process
+        self.llm = get_llm()
+        self.env = get_template_env()
+    
+    def _generate_sections(self, prompts: Dict[str, str], progress: ProgressCallback = None) -> Dict[str, str]:
+        """Send all section prompts of one document concurrently.
+
+        At most SECTION_CONCURRENCY prompts run at the same time and each one
+        gets SECTION_TIMEOUT seconds from the moment it starts. The responses
+        are returned in the same order as the prompts were given.
+        """
+        started_at = {}
         
-    def _create_pdf(self, content: str, filename: str, language: str = "en") -> str:
-        os.makedirs("generated_pdfs", exist_ok=True)
-        filepath = os.path.join("generated_pdfs", filename)
+        def ask(name: str, prompt: str) -> str:
+            started_at[name] = time.monotonic()
+            report_progress(progress, f"section:{name}", "running")
+            response = self.llm([HumanMessage(content=prompt)]).content
+            report_progress(progress, f"section:{name}", "done")
+            return response
         
-        doc = SimpleDocTemplate(
-            filepath,
-            pagesize=LETTER,
-            rightMargin=72,
-            leftMargin=72,
-            topMargin=72,
-            bottomMargin=72
+        executor = ThreadPoolExecutor(
+            max_workers=max(1, min(SECTION_CONCURRENCY, len(prompts))),
+            thread_name_prefix=f"{self.name}-section"
         )
+        try:
+            for name in prompts:
+                report_progress(progress, f"section:{name}", "queued")
+            futures = {name: executor.submit(ask, name, prompt) for name, prompt in prompts.items()}
+            responses = {}
+            for name, future in futures.items():
+                while True:
+                    # Sections waiting for a free slot have not started their clock yet
+                    start = started_at.get(name)
+                    remaining = SECTION_TIMEOUT if start is None else start + SECTION_TIMEOUT - time.monotonic()
+                    try:
+                        responses[name] = future.result(timeout=max(remaining, 0))
+                        break
+                    except FuturesTimeoutError:
+                        if start is not None:
+                            raise TimeoutError(f"{self.name} section '{name}' timed out after {SECTION_TIMEOUT:g} seconds")
+            return responses
+        finally:
+            # Do not wait for sections that were abandoned after a timeout or error
+            executor.shutdown(wait=False, cancel_futures=True)
         
-        font_name = LANGUAGE_CONFIG.get(language, LANGUAGE_CONFIG["en"])['font']
-        styles = getSampleStyleSheet()
-        styles.add(ParagraphStyle(
-            name='Justify',
-            alignment=TA_JUSTIFY,
-            fontName=font_name,
-            fontSize=12,
-            leading=14,
-            spaceBefore=6,
-            spaceAfter=6
-        ))
-        styles.add(ParagraphStyle(
-            name='Center',
-            alignment=TA_CENTER,
-            fontName=font_name,
-            fontSize=12,
-            leading=14,
-            spaceBefore=6,
-            spaceAfter=6
-        ))
-        styles.add(ParagraphStyle(
-            name='Header',
-            alignment=TA_CENTER,
-            fontName=font_name,
-            fontSize=14,
-            leading=16,
-            spaceBefore=12,
-            spaceAfter=12
-        ))
-        styles.add(ParagraphStyle(
-            name='SubHeader',
-            alignment=TA_JUSTIFY,
-            fontName=font_name,
-            fontSize=12,
-            leading=14,
-            spaceBefore=12,
-            spaceAfter=6
-        ))
-        
-        story = []
-        lines = content.split('\n')
-        
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-                
-            if line.startswith(('FACTS OF THE CASE:', 'LEGAL BASIS:', 'PRAYERS:', 'VERIFICATION:')):
-                story.append(Spacer(1, 12))
-                story.append(Paragraph(line, styles['SubHeader']))
-            elif line.startswith('To,'):
-                story.append(Paragraph(line, styles['Justify']))
-            elif line.startswith('Subject:'):
-                story.append(Spacer(1, 12))
-                story.append(Paragraph(line, styles['Justify']))
-            elif line.startswith('Respected'):
-                story.append(Spacer(1, 12))
-                story.append(Paragraph(line, styles['Justify']))
-            elif line.startswith(('1.', '2.', '3.', '4.', '5.', '6.', '7.')):
-                story.append(Paragraph(line, styles['Justify']))
-            elif line in ['Petitioner', 'Respondents']:
-                story.append(Paragraph(line, styles['Center']))
-            elif line.startswith(('PLACE:', 'DATE:')):
-                story.append(Paragraph(line, styles['Justify']))
-            else:
-                story.append(Paragraph(line, styles['Justify']))
-                
-        doc.build(story)
-        return filepath
+    @abstractmethod
+    def _compose(self, user_issue: str, insights: str, user_name: str, location: str, contact_number: str = None, language: str = "en", progress: ProgressCallback = None) -> str:
+        """Draft the sections and return the rendered (and translated) document text"""
+    
+    def generate(self, user_issue: str, insights: str, user_name: str, location: str, contact_number: str = None, language: str = "en", progress: ProgressCallback = None) -> GeneratedDocument:
+        """Draft the document and render it to PDF bytes in memory"""
+        content = self._compose(user_issue, insights, user_name, location, contact_number, language, progress)
+        report_progress(progress, "rendering", "running")
+        pdf = render_pool.render(content, language)
+        report_progress(progress, "rendering", "done")
+        return GeneratedDocument(
+            document_type=self.name,
+            filename=f"{self.name}_{user_name.replace(' ', '_')}_{language}.pdf",
+            language=language,
+            content=content,
+            pdf=pdf
+        )
+    
+    def _run(self, user_issue: str, insights: str, user_name: str, location: str, contact_number: str = None, language: str = "en", progress: ProgressCallback = None) -> str:
+        document = self.generate(user_issue, insights, user_name, location, contact_number, language, progress)
+        return document_store.save(document.filename, document.pdf)
 
 class PILTool(BaseLegalTool):
     name = "PIL"
     description = "Generate a Public Interest Litigation (PIL) document"
     template_file = "pil_template.txt"
     
-    def _generate_legal_content(self, user_issue: str, insights: str) -> tuple[str, str, list]:
+    def _generate_legal_content(self, user_issue: str, insights: str, progress: ProgressCallback = None) -> tuple[str, str, list]:
         # First generate the facts of the case
         facts_prompt = (
             f"You are a senior advocate drafting a PIL petition. Given the following issue, write a concise and relevant FACTS OF THE CASE section.\n"
@@ -156,13 +144,6 @@ class PILTool(BaseLegalTool):
             f"2. [Second key point]\n"
             f"3. [Third key point]"
         )
-        facts_messages = [HumanMessage(content=facts_prompt)]
-        facts_response = self.llm(facts_messages).content
-        
-        # Clean up the facts response
-        facts_lines = [line.strip() for line in facts_response.split('\n') if line.strip()]
-        facts_lines = [re.sub(r'\*\*|\*', '', line) for line in facts_lines]
-        issue_summary = '\n'.join(facts_lines)
         
         # Now generate the legal basis
         legal_prompt = (
@@ -180,13 +161,6 @@ class PILTool(BaseLegalTool):
             f"3. [Third legal point with citation]\n"
             f"4. [Fourth legal point with citation]"
         )
-        legal_messages = [HumanMessage(content=legal_prompt)]
-        legal_response = self.llm(legal_messages).content
-        
-        # Clean up the legal response
-        legal_lines = [line.strip() for line in legal_response.split('\n') if line.strip()]
-        legal_lines = [re.sub(r'\*\*|\*', '', line) for line in legal_lines]
-        legal_insights = '\n'.join(legal_lines)
         
         # Finally generate the prayers
         prayers_prompt = (
@@ -204,8 +178,26 @@ class PILTool(BaseLegalTool):
             f"1. [First prayer]\n"
             f"2. [Second prayer]"
         )
-        prayers_messages = [HumanMessage(content=prayers_prompt)]
-        prayers_response = self.llm(prayers_messages).content
+
+        # Send every section prompt at once; responses come back in this order
+        responses = self._generate_sections({
+            "facts": facts_prompt,
+            "legal": legal_prompt,
+            "prayers": prayers_prompt,
+        }, progress)
+        facts_response = responses["facts"]
+        legal_response = responses["legal"]
+        prayers_response = responses["prayers"]
+        
+        # Clean up the facts response
+        facts_lines = [line.strip() for line in facts_response.split('\n') if line.strip()]
+        facts_lines = [re.sub(r'\*\*|\*', '', line) for line in facts_lines]
+        issue_summary = '\n'.join(facts_lines)
+        
+        # Clean up the legal response
+        legal_lines = [line.strip() for line in legal_response.split('\n') if line.strip()]
+        legal_lines = [re.sub(r'\*\*|\*', '', line) for line in legal_lines]
+        legal_insights = '\n'.join(legal_lines)
         
         # Clean up and format the prayers
         prayers = [prayer.strip() for prayer in prayers_response.split('\n') if prayer.strip()]
@@ -215,8 +207,8 @@ class PILTool(BaseLegalTool):
         
         return issue_summary, legal_insights, formatted_prayers
     
-    def _run(self, user_issue: str, insights: str, user_name: str, location: str, contact_number: str = None, language: str = "en") -> str:
-        issue_summary, legal_insights, prayers = self._generate_legal_content(user_issue, insights)
+    def _compose(self, user_issue: str, insights: str, user_name: str, location: str, contact_number: str = None, language: str = "en", progress: ProgressCallback = None) -> str:
+        issue_summary, legal_insights, prayers = self._generate_legal_content(user_issue, insights, progress)
         current_date = datetime.now()
         location_parts = location.split(',')
         city = location_parts[0].strip()
@@ -246,17 +238,17 @@ class PILTool(BaseLegalTool):
             contact_details=f"Contact: {contact_number or '[Contact Number]'}\nAddress: {city}"
         )
         if language != "en":
-            from legal_agent import LegalDocumentAgent
-            content = LegalDocumentAgent().translate_text(content, language)
-        filename = f"PIL_{user_name.replace(' ', '_')}_{language}.pdf"
-        return self._create_pdf(content, filename, language)
+            report_progress(progress, "translation", "running")
+            content = get_translation_service().translate_text(content, language)
+            report_progress(progress, "translation", "done")
+        return content
 
 class RTITool(BaseLegalTool):
     name = "RTI"
     description = "Generate a Right to Information (RTI) application"
     template_file = "rti_template.txt"
     
-    def _generate_legal_content(self, user_issue: str, insights: str) -> tuple[str, str, str, list]:
+    def _generate_legal_content(self, user_issue: str, insights: str, progress: ProgressCallback = None) -> tuple[str, str, str, list]:
         # First generate the information sought
         info_prompt = (
             f"You are a legal expert drafting an RTI application. Given the following issue, write a clear and specific INFORMATION SOUGHT section.\n"
@@ -274,13 +266,6 @@ class RTITool(BaseLegalTool):
             f"4. [Fourth information point]\n"
             f"5. [Fifth information point]"
         )
-        info_messages = [HumanMessage(content=info_prompt)]
-        info_response = self.llm(info_messages).content
-        
-        # Clean up the information sought response
-        info_lines = [line.strip() for line in info_response.split('\n') if line.strip()]
-        info_lines = [re.sub(r'\*\*|\*', '', line) for line in info_lines]
-        information_sought = '\n'.join(info_lines)
         
         # Generate the legal basis
         legal_prompt = (
@@ -298,13 +283,6 @@ class RTITool(BaseLegalTool):
             f"3. [Third legal point with citation]\n"
             f"4. [Fourth legal point with citation]"
         )
-        legal_messages = [HumanMessage(content=legal_prompt)]
-        legal_response = self.llm(legal_messages).content
-        
-        # Clean up the legal response
-        legal_lines = [line.strip() for line in legal_response.split('\n') if line.strip()]
-        legal_lines = [re.sub(r'\*\*|\*', '', line) for line in legal_lines]
-        legal_basis = '\n'.join(legal_lines)
         
         # Generate the department details
         department_prompt = (
@@ -318,8 +296,26 @@ class RTITool(BaseLegalTool):
             f"Department: [department name]\n"
             f"Additional Info: [any additional information]"
         )
-        department_messages = [HumanMessage(content=department_prompt)]
-        department_response = self.llm(department_messages).content
+
+        # Send every section prompt at once; responses come back in this order
+        responses = self._generate_sections({
+            "info": info_prompt,
+            "legal": legal_prompt,
+            "department": department_prompt,
+        }, progress)
+        info_response = responses["info"]
+        legal_response = responses["legal"]
+        department_response = responses["department"]
+        
+        # Clean up the information sought response
+        info_lines = [line.strip() for line in info_response.split('\n') if line.strip()]
+        info_lines = [re.sub(r'\*\*|\*', '', line) for line in info_lines]
+        information_sought = '\n'.join(info_lines)
+        
+        # Clean up the legal response
+        legal_lines = [line.strip() for line in legal_response.split('\n') if line.strip()]
+        legal_lines = [re.sub(r'\*\*|\*', '', line) for line in legal_lines]
+        legal_basis = '\n'.join(legal_lines)
         
         # Parse department details
         department_lines = [line.strip() for line in department_response.split('\n') if line.strip()]
@@ -346,8 +342,8 @@ class RTITool(BaseLegalTool):
         
         return information_sought, legal_basis, department_dict.get('name', 'Revenue Department'), formatted_additional_info
     
-    def _run(self, user_issue: str, insights: str, user_name: str, location: str, contact_number: str = None, language: str = "en") -> str:
-        information_sought, legal_basis, department_name, additional_info = self._generate_legal_content(user_issue, insights)
+    def _compose(self, user_issue: str, insights: str, user_name: str, location: str, contact_number: str = None, language: str = "en", progress: ProgressCallback = None) -> str:
+        information_sought, legal_basis, department_name, additional_info = self._generate_legal_content(user_issue, insights, progress)
         current_date = datetime.now().strftime("%d %B, %Y")
         location_parts = location.split(',')
         city = location_parts[0].strip()
@@ -366,17 +362,17 @@ class RTITool(BaseLegalTool):
             contact_number=contact_number if contact_number else "[Contact Number Not Provided]"
         )
         if language != "en":
-            from legal_agent import LegalDocumentAgent
-            content = LegalDocumentAgent().translate_text(content, language)
-        filename = f"RTI_{user_name.replace(' ', '_')}_{language}.pdf"
-        return self._create_pdf(content, filename, language)
+            report_progress(progress, "translation", "running")
+            content = get_translation_service().translate_text(content, language)
+            report_progress(progress, "translation", "done")
+        return content
 
 class ComplaintTool(BaseLegalTool):
     name = "Complaint"
     description = "Generate a formal complaint document"
     template_file = "complaint_template.txt"
     
-    def _generate_legal_content(self, user_issue: str, insights: str) -> tuple[str, str, str, str, str, list, list]:
+    def _generate_legal_content(self, user_issue: str, insights: str, progress: ProgressCallback = None) -> tuple[str, str, str, str, str, list, list]:
         # First generate the facts of the case
         facts_prompt = (
             f"You are a legal expert drafting a consumer complaint. Given the following issue, write a concise and relevant FACTS OF THE CASE section.\n"
@@ -394,13 +390,6 @@ class ComplaintTool(BaseLegalTool):
             f"3. [Third key point]\n"
             f"4. [Fourth key point]"
         )
-        facts_messages = [HumanMessage(content=facts_prompt)]
-        facts_response = self.llm(facts_messages).content
-        
-        # Clean up the facts response
-        facts_lines = [line.strip() for line in facts_response.split('\n') if line.strip()]
-        facts_lines = [re.sub(r'\*\*|\*', '', line) for line in facts_lines]
-        issue_summary = '\n'.join(facts_lines)
         
         # Generate the legal basis
         legal_prompt = (
@@ -418,13 +407,6 @@ class ComplaintTool(BaseLegalTool):
             f"3. [Third legal point with citation]\n"
             f"4. [Fourth legal point with citation]"
         )
-        legal_messages = [HumanMessage(content=legal_prompt)]
-        legal_response = self.llm(legal_messages).content
-        
-        # Clean up the legal response
-        legal_lines = [line.strip() for line in legal_response.split('\n') if line.strip()]
-        legal_lines = [re.sub(r'\*\*|\*', '', line) for line in legal_lines]
-        legal_insights = '\n'.join(legal_lines)
         
         # Generate the authority details
         authority_prompt = (
@@ -440,19 +422,6 @@ class ComplaintTool(BaseLegalTool):
             f"Name: [authority name]\n"
             f"Subject: [complaint subject]"
         )
-        authority_messages = [HumanMessage(content=authority_prompt)]
-        authority_response = self.llm(authority_messages).content
-        
-        # Parse authority details
-        authority_lines = [line.strip() for line in authority_response.split('\n') if line.strip()]
-        authority_dict = {}
-        for line in authority_lines:
-            if line.startswith('Designation:'):
-                authority_dict['designation'] = line.replace('Designation:', '').strip()
-            elif line.startswith('Name:'):
-                authority_dict['name'] = line.replace('Name:', '').strip()
-            elif line.startswith('Subject:'):
-                authority_dict['subject'] = line.replace('Subject:', '').strip()
         
         # Generate the prayers
         prayers_prompt = (
@@ -471,14 +440,6 @@ class ComplaintTool(BaseLegalTool):
             f"2. [Second prayer]\n"
             f"3. [Third prayer]"
         )
-        prayers_messages = [HumanMessage(content=prayers_prompt)]
-        prayers_response = self.llm(prayers_messages).content
-        
-        # Clean up and format the prayers
-        prayers = [prayer.strip() for prayer in prayers_response.split('\n') if prayer.strip()]
-        prayers = [re.sub(r'\*\*|\*', '', prayer) for prayer in prayers]
-        prayers = [re.sub(r'^\d+\.\s*', '', prayer) for prayer in prayers]
-        formatted_prayers = [f"{i+1}. {prayer}" for i, prayer in enumerate(prayers)]
         
         # Generate the documents list
         documents_prompt = (
@@ -497,8 +458,47 @@ class ComplaintTool(BaseLegalTool):
             f"4. [Fourth document]\n"
             f"5. [Fifth document]"
         )
-        documents_messages = [HumanMessage(content=documents_prompt)]
-        documents_response = self.llm(documents_messages).content
+
+        # Send every section prompt at once; responses come back in this order
+        responses = self._generate_sections({
+            "facts": facts_prompt,
+            "legal": legal_prompt,
+            "authority": authority_prompt,
+            "prayers": prayers_prompt,
+            "documents": documents_prompt,
+        }, progress)
+        facts_response = responses["facts"]
+        legal_response = responses["legal"]
+        authority_response = responses["authority"]
+        prayers_response = responses["prayers"]
+        documents_response = responses["documents"]
+        
+        # Clean up the facts response
+        facts_lines = [line.strip() for line in facts_response.split('\n') if line.strip()]
+        facts_lines = [re.sub(r'\*\*|\*', '', line) for line in facts_lines]
+        issue_summary = '\n'.join(facts_lines)
+        
+        # Clean up the legal response
+        legal_lines = [line.strip() for line in legal_response.split('\n') if line.strip()]
+        legal_lines = [re.sub(r'\*\*|\*', '', line) for line in legal_lines]
+        legal_insights = '\n'.join(legal_lines)
+        
+        # Parse authority details
+        authority_lines = [line.strip() for line in authority_response.split('\n') if line.strip()]
+        authority_dict = {}
+        for line in authority_lines:
+            if line.startswith('Designation:'):
+                authority_dict['designation'] = line.replace('Designation:', '').strip()
+            elif line.startswith('Name:'):
+                authority_dict['name'] = line.replace('Name:', '').strip()
+            elif line.startswith('Subject:'):
+                authority_dict['subject'] = line.replace('Subject:', '').strip()
+        
+        # Clean up and format the prayers
+        prayers = [prayer.strip() for prayer in prayers_response.split('\n') if prayer.strip()]
+        prayers = [re.sub(r'\*\*|\*', '', prayer) for prayer in prayers]
+        prayers = [re.sub(r'^\d+\.\s*', '', prayer) for prayer in prayers]
+        formatted_prayers = [f"{i+1}. {prayer}" for i, prayer in enumerate(prayers)]
         
         # Clean up and format the documents
         documents = [doc.strip() for doc in documents_response.split('\n') if doc.strip()]
@@ -516,8 +516,8 @@ class ComplaintTool(BaseLegalTool):
             formatted_documents
         )
     
-    def _run(self, user_issue: str, insights: str, user_name: str, location: str, contact_number: str = None, language: str = "en") -> str:
-        issue_summary, legal_insights, authority_designation, authority_name, complaint_subject, prayers, documents = self._generate_legal_content(user_issue, insights)
+    def _compose(self, user_issue: str, insights: str, user_name: str, location: str, contact_number: str = None, language: str = "en", progress: ProgressCallback = None) -> str:
+        issue_summary, legal_insights, authority_designation, authority_name, complaint_subject, prayers, documents = self._generate_legal_content(user_issue, insights, progress)
         current_date = datetime.now().strftime("%d %B, %Y")
         respondent_match = re.search(r"from\s+([^,]+)", user_issue)
         respondent_name = respondent_match.group(1) if respondent_match else "Concerned Authority"
@@ -538,7 +538,8 @@ class ComplaintTool(BaseLegalTool):
             contact_details=f"Contact: {contact_number or '[Contact Number]'}\nAddress: {location}"
         )
         if language != "en":
-            from legal_agent import LegalDocumentAgent
-            content = LegalDocumentAgent().translate_text(content, language)
-        filename = f"Complaint_{user_name.replace(' ', '_')}_{language}.pdf"
-        return self._create_pdf(content, filename, language) 
\ No newline at end of file
+            report_progress(progress, "translation", "running")
+            content = get_translation_service().translate_text(content, language)
+            report_progress(progress, "translation", "done")
+        return content
+ 
\ No newline at end of file
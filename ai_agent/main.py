@@ -1,10 +1,23 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ValidationError, field_validator
+from typing import List, Optional
+import csv
+import io
+import json
 import os
 import httpx
+from urllib.parse import quote
 from legal_agent import LegalDocumentAgent
+from legal_tools import GeneratedDocument
+from storage import document_store, PERSIST_PDFS
+from workers import generation_pool, QueueFullError
+from jobs import JobStore, JobRunner, JOB_QUEUE_LIMIT
+from translation import get_translation_service
+from rendering import render_pool
+from batch import run_batch, build_manifest, build_zip, BATCH_MAX_ITEMS
 
 app = FastAPI()
 
@@ -17,42 +30,220 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-legal_agent = LegalDocumentAgent()
+# Built by the startup hook rather than at import time. Render workers are
+# spawned, and a spawned process re-imports the parent's __main__ module
+# (this file, when run as python main.py), so importing it must stay cheap
+# and free of side effects.
+legal_agent: LegalDocumentAgent = None
+job_store: JobStore = None
+job_runner: JobRunner = None
 
 class DocumentRequest(BaseModel):
     user_input: str
     user_name: str
     location: str
     contact_number: str = Field(description="Contact number of the applicant")
+    use_cache: bool = Field(default=True, description="Reuse an identical previously generated document if one is cached")
+
+    @field_validator("user_input")
+    @classmethod
+    def user_input_not_blank(cls, value: str) -> str:
+        # An empty CSV row (",,,") would otherwise draft a document about nothing
+        if not value.strip():
+            raise ValueError("user_input must not be blank")
+        return value
+
+class BatchRequest(BaseModel):
+    items: List[DocumentRequest]
+    output: str = Field(default="zip", description="'zip' for an archive of PDFs, 'manifest' for per-item results only")
+
+def run_job(request: dict, progress) -> str:
+    """Generate the document for a queued job, reporting each stage as it runs"""
+    return legal_agent.generate_document(
+        user_input=request["user_input"],
+        user_name=request["user_name"],
+        location=request["location"],
+        contact_number=request["contact_number"],
+        progress=progress,
+        use_cache=request.get("use_cache", True)
+    )
+
+@app.on_event("startup")
+def start_background_workers():
+    global legal_agent, job_store, job_runner
+    legal_agent = LegalDocumentAgent()
+    job_store = JobStore()
+    job_runner = JobRunner(job_store, run_job)
+    render_pool.start()
+    job_runner.start()
+
+@app.on_event("shutdown")
+def stop_render_pool():
+    render_pool.shutdown()
+
+def queue_full_error() -> HTTPException:
+    """429 returned when every generation worker and queue slot is taken"""
+    return HTTPException(
+        status_code=429,
+        detail="Document generation queue is full, please retry shortly",
+        headers={"Retry-After": "5"}
+    )
+
+async def pdf_response(document: GeneratedDocument) -> StreamingResponse:
+    """Stream a generated PDF from memory, keeping a copy on disk only if PERSIST_PDFS is set"""
+    if PERSIST_PDFS:
+        await run_in_threadpool(document_store.save, document.filename, document.pdf)
+    return StreamingResponse(
+        io.BytesIO(document.pdf),
+        media_type="application/pdf",
+        headers={
+            "Content-Disposition": f"attachment; filename*=utf-8''{quote(document.filename)}",
+            "Content-Length": str(len(document.pdf))
+        }
+    )
 
 @app.post("/generate_document")
 async def generate_document(request: DocumentRequest):
     try:
-        # Generate the document using the agent
-        pdf_path = legal_agent.generate_document(
+        # Generate the document on a worker thread so the event loop stays free
+        document = await generation_pool.run(
+            legal_agent.generate,
             user_input=request.user_input,
             user_name=request.user_name,
             location=request.location,
-            contact_number=request.contact_number
-        )
-        
-        if not os.path.exists(pdf_path):
-            raise HTTPException(status_code=500, detail="Document generation failed")
-
-        # Return PDF file as response
-        return FileResponse(
-            pdf_path,
-            media_type="application/pdf",
-            filename=os.path.basename(pdf_path)
+            contact_number=request.contact_number,
+            use_cache=request.use_cache
         )
+
+        # Stream the PDF straight from memory
+        return await pdf_response(document)
+    except QueueFullError:
+        raise queue_full_error()
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+async def generate_batch_response(items: List[dict], errors: List[dict], output: str):
+    """Run a batch on the worker pool and package the per-item results"""
+    if output not in ("zip", "manifest"):
+        raise HTTPException(status_code=422, detail="output must be 'zip' or 'manifest'")
+    if len(items) + len(errors) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"A batch may contain at most {BATCH_MAX_ITEMS} items")
+    try:
+        results = await generation_pool.run(run_batch, legal_agent, items) if items else []
+    except QueueFullError:
+        raise queue_full_error()
+
+    # Put the generated results and the rows that failed validation back in input order
+    failed = {error["index"] for error in errors}
+    positions = [i for i in range(len(items) + len(errors)) if i not in failed]
+    for position, result in zip(positions, results):
+        result["index"] = position
+    results = sorted(results + errors, key=lambda result: result["index"])
+
+    if output == "manifest":
+        return {"status": "success", "results": build_manifest(results)}
+    return Response(
+        content=build_zip(results),
+        media_type="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="documents.zip"'}
+    )
+
+def validate_batch_rows(rows: List[dict]):
+    """Split uploaded rows into valid requests and per-row validation errors"""
+    items, errors = [], []
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            errors.append({"index": index, "status": "error", "error": "Row is not a valid JSON object"})
+            continue
+        try:
+            items.append(DocumentRequest(**row).model_dump())
+        except (ValidationError, TypeError) as e:
+            errors.append({"index": index, "status": "error", "error": str(e)})
+    return items, errors
+
+@app.post("/generate_batch")
+async def generate_batch(request: BatchRequest):
+    """Generate many documents at once and return a ZIP or a manifest"""
+    items = [item.model_dump() for item in request.items]
+    return await generate_batch_response(items, [], request.output)
+
+@app.post("/generate_batch/upload")
+async def generate_batch_upload(file: UploadFile = File(...), output: str = "zip"):
+    """Same as /generate_batch, for an uploaded NDJSON or CSV file of requests"""
+    text = (await file.read()).decode("utf-8-sig")
+    if (file.filename or "").lower().endswith(".csv") or file.content_type == "text/csv":
+        rows = list(csv.DictReader(io.StringIO(text)))
+    else:
+        rows = []
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                rows.append(None)
+    items, errors = validate_batch_rows(rows)
+    return await generate_batch_response(items, errors, output)
+
+@app.post("/jobs", status_code=202)
+async def submit_job(request: DocumentRequest):
+    """Queue a document for generation and return its job id right away"""
+    if job_store.count("queued") >= JOB_QUEUE_LIMIT:
+        raise queue_full_error()
+    job_id = job_runner.submit(request.model_dump())
+    return {
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": f"/jobs/{job_id}",
+        "download_url": f"/jobs/{job_id}/download"
+    }
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    job.pop("result_path")
+    return job
+
+@app.get("/jobs/{job_id}/download")
+async def download_job(job_id: str):
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] != "done":
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+    pdf_path = job["result_path"]
+    if not pdf_path or not os.path.exists(pdf_path):
+        raise HTTPException(status_code=410, detail="Generated document is no longer available")
+    return FileResponse(
+        pdf_path,
+        media_type="application/pdf",
+        filename=os.path.basename(pdf_path)
+    )
+
+@app.get("/metrics")
+async def metrics():
+    """Counters for the caches and worker pools of this process"""
+    return {
+        "generation_pool": generation_pool.stats(),
+        "classification_cache": legal_agent.classification_cache.stats(),
+        "document_cache": legal_agent.document_cache.stats(),
+        "translation_cache": get_translation_service().stats(),
+        "render_pool": render_pool.stats(),
+        "document_store": document_store.stats(),
+        "jobs": {status: job_store.count(status) for status in ("queued", "running", "done", "failed")}
+    }
+
 @app.get("/generate_from_backend")
 async def generate_from_backend(
     test: bool = False,
     api_url: str = "http://localhost:9000/api/process-backend",
-    method: str = "get"
+    method: str = "get",
+    use_cache: bool = True,
+    session_id: Optional[str] = None
 ):
     try:
         # Use mock data for testing if requested
@@ -67,16 +258,20 @@ async def generate_from_backend(
                 }
             }
         else:
+            # The backend only answers for the query saved under a session id
+            if not session_id:
+                raise HTTPException(status_code=400, detail="session_id is required unless test=true")
             # Fetch data from the backend API
             try:
                 method = method.lower()
                 print(f"Attempting to connect to {api_url} using {method.upper()} method")
                 
+                params = {"session_id": session_id}
                 async with httpx.AsyncClient() as client:
                     if method == "post":
-                        response = await client.post(api_url, timeout=30.0)
+                        response = await client.post(api_url, params=params, timeout=30.0)
                     else:  # default to GET
-                        response = await client.get(api_url, timeout=30.0)
+                        response = await client.get(api_url, params=params, timeout=30.0)
                     
                     # Print response status for debugging
                     print(f"API Response status: {response.status_code}")
@@ -114,24 +309,23 @@ async def generate_from_backend(
         if not user_input:
             raise HTTPException(status_code=422, detail="Missing langchain_response in backend data")
         
-        # Generate document using the extracted data
-        pdf_path = legal_agent.generate_document(
+        # Generate document using the extracted data, off the event loop
+        document = await generation_pool.run(
+            legal_agent.generate,
             user_input=user_input,
             user_name=user_name,
             location=location,
-            contact_number=contact_number
+            contact_number=contact_number,
+            use_cache=use_cache
         )
-        
-        if not os.path.exists(pdf_path):
-            raise HTTPException(status_code=500, detail="Document generation failed")
             
-        # Return PDF file as response
-        return FileResponse(
-            pdf_path,
-            media_type="application/pdf",
-            filename=os.path.basename(pdf_path)
-        )
+        # Stream the PDF straight from memory
+        return await pdf_response(document)
         
+    except QueueFullError:
+        raise queue_full_error()
+    except HTTPException:
+        raise
     except Exception as e:
         import traceback
         print(f"Error in generate_from_backend: {str(e)}")
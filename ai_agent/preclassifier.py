@@ -0,0 +1,155 @@
+from typing import Dict, Optional, Tuple
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+import time
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Minimum confidence for the local answer to be used without asking the LLM
+PRECLASSIFIER_THRESHOLD = float(os.getenv("PRECLASSIFIER_THRESHOLD", "0.85"))
+# Where classification decisions are appended (JSON lines) for offline
+# evaluation; off unless set. Inputs are logged as a hash and length unless
+# CLASSIFICATION_LOG_INPUTS is true, since they hold users' names, addresses
+# and case facts. The file is rotated to <path>.1 past CLASSIFICATION_LOG_MAX_BYTES.
+CLASSIFICATION_LOG_PATH = os.getenv("CLASSIFICATION_LOG_PATH", "")
+CLASSIFICATION_LOG_INPUTS = os.getenv("CLASSIFICATION_LOG_INPUTS", "false").lower() == "true"
+CLASSIFICATION_LOG_MAX_BYTES = int(os.getenv("CLASSIFICATION_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+
+# Weighted cue phrases per document type. Phrases are matched on word
+# boundaries in the lower-cased issue and insights text.
+KEYWORD_WEIGHTS: Dict[str, Dict[str, float]] = {
+    "PIL": {
+        "public interest": 3.0,
+        "public interest litigation": 4.0,
+        "pil": 3.0,
+        "fundamental right": 2.5,
+        "fundamental rights": 2.5,
+        "constitutional": 2.0,
+        "article 21": 2.5,
+        "article 14": 2.0,
+        "article 32": 2.5,
+        "article 226": 2.5,
+        "environment": 2.0,
+        "environmental": 2.0,
+        "pollution": 2.5,
+        "public health": 2.0,
+        "public safety": 2.0,
+        "public welfare": 2.0,
+        "governance": 1.5,
+        "policy": 1.0,
+        "residents": 1.0,
+        "community": 1.0,
+        "villagers": 1.5,
+        "deforestation": 2.0,
+        "encroachment": 1.5,
+        "sewage": 1.5,
+        "river": 1.0,
+        "illegal construction": 1.5,
+    },
+    "RTI": {
+        "rti": 4.0,
+        "right to information": 4.0,
+        "information act": 3.0,
+        "section 6": 2.0,
+        "public information officer": 3.5,
+        "information": 1.5,
+        "records": 2.0,
+        "copies of": 2.0,
+        "certified copy": 2.0,
+        "details of": 1.5,
+        "status of": 1.0,
+        "transparency": 1.5,
+        "disclose": 1.5,
+        "sanctioned": 1.0,
+        "expenditure": 1.5,
+        "utilization": 1.0,
+        "file noting": 2.5,
+    },
+    "COMPLAINT": {
+        "consumer": 3.0,
+        "consumer protection": 3.5,
+        "defective": 3.0,
+        "deficiency in service": 3.5,
+        "deficient service": 3.0,
+        "refund": 3.0,
+        "replacement": 2.5,
+        "warranty": 2.5,
+        "guarantee": 1.5,
+        "compensation": 1.5,
+        "purchased": 2.0,
+        "bought": 2.0,
+        "seller": 2.0,
+        "invoice": 2.0,
+        "bill": 1.0,
+        "customer care": 2.5,
+        "overcharged": 2.5,
+        "delivery": 1.5,
+        "landlord": 1.5,
+        "fraud": 1.0,
+    },
+}
+
+def _compile_patterns(weights: Dict[str, Dict[str, float]]):
+    # One alternation per label; longest phrases first so they win over their prefixes
+    return {
+        label: re.compile(
+            r"\b(" + "|".join(re.escape(phrase) for phrase in sorted(phrases, key=len, reverse=True)) + r")\b"
+        )
+        for label, phrases in weights.items()
+    }
+
+_PATTERNS = _compile_patterns(KEYWORD_WEIGHTS)
+
+def score(text: str) -> Dict[str, float]:
+    """Sum of cue weights per document type for the given text"""
+    text = text.lower()
+    return {
+        label: sum(KEYWORD_WEIGHTS[label][match] for match in pattern.findall(text))
+        for label, pattern in _PATTERNS.items()
+    }
+
+def preclassify(text: str) -> Tuple[Optional[str], float]:
+    """Return (document type, confidence) from the weighted keyword scores.
+
+    Confidence is the softmax probability of the best label, scaled down when
+    there is little evidence at all, so short or vague inputs stay below the
+    threshold and go to the LLM. Returns (None, 0.0) when nothing matched.
+    """
+    scores = score(text)
+    best = max(scores, key=scores.get)
+    if scores[best] <= 0:
+        return None, 0.0
+    # Scores grow with the length of the text; shifting by the best score
+    # keeps every exponent <= 0 so long inputs cannot overflow
+    exps = {label: math.exp(value - scores[best]) for label, value in scores.items()}
+    probability = 1.0 / sum(exps.values())
+    evidence = 1.0 - math.exp(-scores[best] / 3.0)
+    return best, probability * evidence
+
+_log_lock = threading.Lock()
+
+def log_decision(text: str, document_type: str, source: str, confidence: float = None):
+    """Append one classification decision to CLASSIFICATION_LOG_PATH"""
+    if not CLASSIFICATION_LOG_PATH:
+        return
+    record = {"time": time.time()}
+    if CLASSIFICATION_LOG_INPUTS:
+        record["input"] = text
+    else:
+        record["input_sha256"] = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        record["input_length"] = len(text)
+    record.update(document_type=document_type, source=source, confidence=confidence)
+    try:
+        with _log_lock:
+            if os.path.exists(CLASSIFICATION_LOG_PATH) and os.path.getsize(CLASSIFICATION_LOG_PATH) >= CLASSIFICATION_LOG_MAX_BYTES:
+                os.replace(CLASSIFICATION_LOG_PATH, CLASSIFICATION_LOG_PATH + ".1")
+            with open(CLASSIFICATION_LOG_PATH, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    except OSError as e:
+        print(f"Could not log classification decision: {str(e)}")
@@ -0,0 +1,90 @@
+from langchain_openai import ChatOpenAI
+from jinja2 import Environment, FileSystemLoader
+import httpx
+import os
+import threading
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Connection pool shared by every OpenAI call made from this process
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "50"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "60"))
+
+# Compiled templates stay in memory; with auto reload on, a template is
+# recompiled as soon as its file changes on disk
+TEMPLATE_DIR = os.getenv("TEMPLATE_DIR", "templates")
+TEMPLATE_AUTO_RELOAD = os.getenv("TEMPLATE_AUTO_RELOAD", "true").lower() == "true"
+
+# Reentrant because building a tool pulls the shared LLM client and template environment
+_lock = threading.RLock()
+_http_client = None
+_llm = None
+_template_env = None
+_tools = {}
+
+def get_http_client() -> httpx.Client:
+    """Get the keep-alive HTTP client shared by all LLM calls"""
+    global _http_client
+    if _http_client is None:
+        with _lock:
+            if _http_client is None:
+                _http_client = httpx.Client(
+                    timeout=HTTP_TIMEOUT,
+                    limits=httpx.Limits(
+                        max_connections=HTTP_MAX_CONNECTIONS,
+                        max_keepalive_connections=HTTP_MAX_KEEPALIVE
+                    )
+                )
+    return _http_client
+
+def get_llm() -> ChatOpenAI:
+    """Get the ChatOpenAI client shared by the agent, the tools and translation"""
+    global _llm
+    if _llm is None:
+        http_client = get_http_client()
+        with _lock:
+            if _llm is None:
+                _llm = ChatOpenAI(
+                    temperature=0.3,
+                    model="gpt-4o-mini",
+                    api_key=os.getenv("OPENAI_API_KEY"),
+                    http_client=http_client
+                )
+    return _llm
+
+def get_template_env() -> Environment:
+    """Get the Jinja environment holding the compiled document templates"""
+    global _template_env
+    if _template_env is None:
+        with _lock:
+            if _template_env is None:
+                _template_env = Environment(
+                    loader=FileSystemLoader(TEMPLATE_DIR),
+                    auto_reload=TEMPLATE_AUTO_RELOAD
+                )
+    return _template_env
+
+def reload_templates():
+    """Drop every compiled template so the next render reads them from disk again"""
+    env = get_template_env()
+    if env.cache is not None:
+        env.cache.clear()
+
+def get_tool(document_type: str):
+    """Get the shared tool instance for PIL, RTI or COMPLAINT"""
+    key = document_type.upper()
+    tool = _tools.get(key)
+    if tool is None:
+        # Imported here because the tools themselves pull their clients from this module
+        from legal_tools import PILTool, RTITool, ComplaintTool
+        tool_classes = {"PIL": PILTool, "RTI": RTITool, "COMPLAINT": ComplaintTool}
+        if key not in tool_classes:
+            raise ValueError(f"Unknown document type: {document_type}")
+        with _lock:
+            tool = _tools.get(key)
+            if tool is None:
+                tool = _tools[key] = tool_classes[key]()
+    return tool
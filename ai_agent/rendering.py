@@ -0,0 +1,225 @@
+from reportlab.lib.pagesizes import LETTER
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle, StyleSheet1
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+from reportlab.lib.enums import TA_JUSTIFY, TA_CENTER
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfbase import pdfmetrics
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from typing import BinaryIO, List, Union
+import io
+import multiprocessing
+import os
+import re
+import threading
+import time
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Worker processes used to lay out PDFs; 0 renders in the calling thread instead
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", str(os.cpu_count() or 1)))
+
+# Register Devanagari font for Hindi
+pdfmetrics.registerFont(TTFont('NotoSansDevanagari', 'fonts/NotoSansDevanagari-Regular.ttf'))
+
+LANGUAGE_CONFIG = {
+    "en": {"font": "Times-Roman"},
+    "hi": {"font": "NotoSansDevanagari"},
+    # Add more languages as needed
+}
+
+# One pass over the start of each line decides how it is laid out:
+# section headings get a gap and the SubHeader style, "Subject:" and
+# "Respected ..." get a gap, the party labels are centred, anything else is
+# a justified paragraph.
+LINE_PATTERN = re.compile(
+    r"(?P<subheader>FACTS OF THE CASE:|LEGAL BASIS:|PRAYERS:|VERIFICATION:)"
+    r"|(?P<spaced>Subject:|Respected)"
+    r"|(?P<center>(?:Petitioner|Respondents)$)"
+)
+
+@lru_cache(maxsize=None)
+def get_stylesheet(font_name: str) -> StyleSheet1:
+    """Stylesheet for one font, built once per process and shared by every render"""
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(
+        name='Justify',
+        alignment=TA_JUSTIFY,
+        fontName=font_name,
+        fontSize=12,
+        leading=14,
+        spaceBefore=6,
+        spaceAfter=6
+    ))
+    styles.add(ParagraphStyle(
+        name='Center',
+        alignment=TA_CENTER,
+        fontName=font_name,
+        fontSize=12,
+        leading=14,
+        spaceBefore=6,
+        spaceAfter=6
+    ))
+    styles.add(ParagraphStyle(
+        name='Header',
+        alignment=TA_CENTER,
+        fontName=font_name,
+        fontSize=14,
+        leading=16,
+        spaceBefore=12,
+        spaceAfter=12
+    ))
+    styles.add(ParagraphStyle(
+        name='SubHeader',
+        alignment=TA_JUSTIFY,
+        fontName=font_name,
+        fontSize=12,
+        leading=14,
+        spaceBefore=12,
+        spaceAfter=6
+    ))
+    return styles
+
+def get_render_profile(language: str) -> StyleSheet1:
+    """Stylesheet for the font configured for a language, English as the default"""
+    return get_stylesheet(LANGUAGE_CONFIG.get(language, LANGUAGE_CONFIG["en"])['font'])
+
+def build_story(content: str, language: str = "en") -> List:
+    styles = get_render_profile(language)
+    justify, center, subheader = styles['Justify'], styles['Center'], styles['SubHeader']
+    story = []
+    for line in content.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        match = LINE_PATTERN.match(line)
+        kind = match.lastgroup if match else None
+        if kind == 'subheader':
+            story.append(Spacer(1, 12))
+            story.append(Paragraph(line, subheader))
+        elif kind == 'spaced':
+            story.append(Spacer(1, 12))
+            story.append(Paragraph(line, justify))
+        elif kind == 'center':
+            story.append(Paragraph(line, center))
+        else:
+            story.append(Paragraph(line, justify))
+    return story
+
+def render_pdf(content: str, target: Union[str, BinaryIO], language: str = "en") -> int:
+    """Lay out content as a PDF into a file path or binary buffer; returns the page count"""
+    doc = SimpleDocTemplate(
+        target,
+        pagesize=LETTER,
+        rightMargin=72,
+        leftMargin=72,
+        topMargin=72,
+        bottomMargin=72
+    )
+    doc.build(build_story(content, language))
+    return doc.page
+
+def render_pdf_bytes(content: str, language: str = "en") -> bytes:
+    buffer = io.BytesIO()
+    render_pdf(content, buffer, language)
+    return buffer.getvalue()
+
+def _init_render_worker():
+    # Fonts are registered when this module is imported in the worker; build
+    # every stylesheet up front too so the first real job does not pay for it
+    for language in LANGUAGE_CONFIG:
+        get_render_profile(language)
+
+class RenderPool:
+    """Pool of worker processes that turn document text into PDF bytes.
+
+    doc.build is CPU-bound pure Python, so running it in separate processes
+    keeps it from competing for the GIL with the request threads and lets
+    rendering use every core. Workers are spawned (not forked) by start(),
+    or on first use without it.
+    """
+
+    def __init__(self, workers: int = RENDER_WORKERS):
+        self.workers = workers
+        self.executor = None
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.failed = 0
+        self.render_seconds = 0.0
+
+    def start(self):
+        """Start the worker processes now instead of on the first render.
+
+        The executor spawns a process only when work arrives and no worker
+        is idle, so one no-op per worker is submitted and waited for.
+        """
+        if self.workers > 0:
+            executor = self._get_executor()
+            for future in [executor.submit(int) for _ in range(self.workers)]:
+                future.result()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self.lock:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_render_worker
+                )
+            return self.executor
+
+    def shutdown(self):
+        """Stop the worker processes, cancelling renders that have not started"""
+        with self.lock:
+            executor, self.executor = self.executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def render(self, content: str, language: str = "en") -> bytes:
+        if self.workers <= 0:
+            return render_pdf_bytes(content, language)
+
+        executor = self._get_executor()
+        with self.lock:
+            self.pending += 1
+        start = time.monotonic()
+        try:
+            pdf = executor.submit(render_pdf_bytes, content, language).result()
+        except BrokenProcessPool:
+            # A worker died; drop the pool so the next render starts a fresh one
+            with self.lock:
+                if self.executor is executor:
+                    self.executor = None
+                self.failed += 1
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        except Exception:
+            with self.lock:
+                self.failed += 1
+            raise
+        else:
+            with self.lock:
+                self.completed += 1
+                self.render_seconds += time.monotonic() - start
+            return pdf
+        finally:
+            with self.lock:
+                self.pending -= 1
+
+    def stats(self) -> dict:
+        with self.lock:
+            busy = min(self.pending, self.workers)
+            return {
+                "workers": self.workers,
+                "busy": busy,
+                "queue_depth": self.pending - busy,
+                "completed": self.completed,
+                "failed": self.failed,
+                "avg_render_ms": round(self.render_seconds / self.completed * 1000, 1) if self.completed else None
+            }
+
+render_pool = RenderPool()
@@ -0,0 +1,92 @@
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import time
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Generated PDFs are kept in memory and streamed back; writing them to disk is
+# optional (the job API always does, so its downloads have a file to serve)
+PERSIST_PDFS = os.getenv("PERSIST_PDFS", "false").lower() == "true"
+PDF_STORE_DIR = os.getenv("PDF_STORE_DIR", "generated_pdfs")
+PDF_RETENTION_SECONDS = float(os.getenv("PDF_RETENTION_SECONDS", str(7 * 24 * 3600)))
+PDF_STORE_MAX_FILES = int(os.getenv("PDF_STORE_MAX_FILES", "1000"))
+
+# Only files this store wrote (a 16 hex digit content hash before .pdf) are
+# ever evicted, so anything else kept in the directory is left alone
+STORED_NAME_PATTERN = re.compile(r".+_[0-9a-f]{16}\.pdf$")
+
+class DocumentStore:
+    """Content-addressed PDF files on local disk with a retention policy.
+
+    A file name ends with a hash of the PDF bytes, so two documents never
+    overwrite each other and saving the same document twice is a no-op.
+    Files older than PDF_RETENTION_SECONDS are removed, and beyond
+    PDF_STORE_MAX_FILES the oldest files go first.
+    """
+
+    def __init__(self, directory: str = PDF_STORE_DIR, retention_seconds: float = PDF_RETENTION_SECONDS, max_files: int = PDF_STORE_MAX_FILES):
+        self.directory = directory
+        self.retention_seconds = retention_seconds
+        self.max_files = max_files
+        self.lock = threading.Lock()
+        self.evicted = 0
+
+    def path_for(self, filename: str, pdf: bytes) -> str:
+        stem, extension = os.path.splitext(filename)
+        digest = hashlib.sha256(pdf).hexdigest()[:16]
+        return os.path.join(self.directory, f"{stem}_{digest}{extension or '.pdf'}")
+
+    def save(self, filename: str, pdf: bytes) -> str:
+        """Write the PDF under a collision-free name and return its path"""
+        os.makedirs(self.directory, exist_ok=True)
+        filepath = self.path_for(filename, pdf)
+        if os.path.exists(filepath):
+            # Same content already stored; refresh it so retention starts over
+            os.utime(filepath)
+        else:
+            # Write to a temporary file first so readers never see a partial PDF
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(pdf)
+            os.replace(tmp_path, filepath)
+        self.evict()
+        return filepath
+
+    def evict(self) -> int:
+        """Apply the retention policy and return how many files were removed"""
+        with self.lock:
+            now = time.time()
+            stored = []
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and STORED_NAME_PATTERN.match(entry.name):
+                    stored.append((entry.stat().st_mtime, entry.path))
+            stored.sort()
+            expired = [path for mtime, path in stored if now - mtime > self.retention_seconds]
+            remaining = len(stored) - len(expired)
+            overflow = [path for _, path in stored[len(expired):len(expired) + max(0, remaining - self.max_files)]]
+            removed = 0
+            for path in expired + overflow:
+                try:
+                    os.remove(path)
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+            self.evicted += removed
+            return removed
+
+    def stats(self) -> dict:
+        with self.lock:
+            files = [entry for entry in os.scandir(self.directory) if entry.is_file() and STORED_NAME_PATTERN.match(entry.name)] if os.path.isdir(self.directory) else []
+            return {
+                "files": len(files),
+                "bytes": sum(entry.stat().st_size for entry in files),
+                "max_files": self.max_files,
+                "evicted": self.evicted
+            }
+
+document_store = DocumentStore()
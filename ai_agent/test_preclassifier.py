@@ -0,0 +1,34 @@
+import json
+import preclassifier
+from preclassifier import preclassify, log_decision
+
+def test_long_input_does_not_overflow():
+    # About the length of a RAG answer passed in by generate_from_backend
+    document_type, confidence = preclassify("information " * 480)
+    assert document_type == "RTI"
+    assert 0.0 < confidence <= 1.0
+
+def test_long_mixed_input_keeps_best_label():
+    text = "public interest litigation about pollution " * 300 + "copies of records " * 10
+    document_type, confidence = preclassify(text)
+    assert document_type == "PIL"
+    assert 0.0 < confidence <= 1.0
+
+def test_no_cues():
+    assert preclassify("hello there") == (None, 0.0)
+
+def test_log_hashes_inputs_and_rotates(tmp_path, monkeypatch):
+    path = tmp_path / "classification_log.jsonl"
+    monkeypatch.setattr(preclassifier, "CLASSIFICATION_LOG_PATH", str(path))
+    monkeypatch.setattr(preclassifier, "CLASSIFICATION_LOG_INPUTS", False)
+    monkeypatch.setattr(preclassifier, "CLASSIFICATION_LOG_MAX_BYTES", 200)
+    log_decision("Ramesh Kumar, 12 MG Road, wants his land records", "RTI", "llm")
+    record = json.loads(path.read_text(encoding="utf-8"))
+    assert "input" not in record
+    assert record["input_length"] == 48
+    assert len(record["input_sha256"]) == 64
+
+    for _ in range(5):
+        log_decision("another issue", "PIL", "local", 0.9)
+    assert (tmp_path / "classification_log.jsonl.1").exists()
+    assert path.stat().st_size < 400
@@ -0,0 +1,118 @@
+from langchain_openai import ChatOpenAI
+from langchain.schema import HumanMessage
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+from typing import Dict, Optional
+import hashlib
+import os
+import re
+import threading
+from dotenv import load_dotenv
+from registry import get_llm
+
+# Load environment variables
+load_dotenv()
+
+# Number of translated fragments kept in memory and how many fragments of one
+# document may be translated at the same time
+TRANSLATION_CACHE_SIZE = int(os.getenv("TRANSLATION_CACHE_SIZE", "2048"))
+TRANSLATION_CONCURRENCY = int(os.getenv("TRANSLATION_CONCURRENCY", "8"))
+
+# Languages we can translate generated documents into
+LANGUAGE_NAMES = {
+    "hi": "Hindi",
+    # Add more languages as needed
+}
+
+class TranslationService:
+    """Translates rendered documents fragment by fragment.
+
+    A document is split into paragraphs and every paragraph is looked up in a
+    content-hash cache first, so boilerplate that appears in every document
+    (RTI Act text, verification blocks, closing lines) is only sent to the
+    model once per language.
+    """
+
+    def __init__(self, llm: Optional[ChatOpenAI] = None):
+        self.llm = llm or get_llm()
+        self.executor = ThreadPoolExecutor(
+            max_workers=TRANSLATION_CONCURRENCY,
+            thread_name_prefix="translation"
+        )
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _cache_key(self, fragment: str, target_language: str) -> str:
+        return hashlib.sha256(f"{target_language}\0{fragment}".encode("utf-8")).hexdigest()
+
+    def _cache_get(self, key: str) -> Optional[str]:
+        with self.lock:
+            translated = self.cache.get(key)
+            if translated is None:
+                self.misses += 1
+                return None
+            self.cache.move_to_end(key)
+            self.hits += 1
+            return translated
+
+    def _cache_put(self, key: str, translated: str):
+        with self.lock:
+            self.cache[key] = translated
+            self.cache.move_to_end(key)
+            while len(self.cache) > TRANSLATION_CACHE_SIZE:
+                self.cache.popitem(last=False)
+
+    def _translate_fragment(self, fragment: str, target_language: str) -> str:
+        language_name = LANGUAGE_NAMES[target_language]
+        prompt = (
+            f"Translate the following part of a legal document to {language_name}, keeping all formatting and legal terminology. "
+            f"Reply with the translation only:\n\n{fragment}\n\n{language_name}:"
+        )
+        return self.llm([HumanMessage(content=prompt)]).content.strip()
+
+    def translate_text(self, text: str, target_language: str) -> str:
+        if target_language not in LANGUAGE_NAMES:
+            return text
+
+        fragments = text.split("\n\n")
+        translated: Dict[str, str] = {}
+        pending = {}
+        for fragment in fragments:
+            # Blank lines, numbers and placeholders like "_____" need no translation
+            if not re.search(r"[^\W\d_]", fragment):
+                continue
+            key = self._cache_key(fragment, target_language)
+            if key in translated or key in pending:
+                continue
+            cached = self._cache_get(key)
+            if cached is not None:
+                translated[key] = cached
+            else:
+                pending[key] = self.executor.submit(self._translate_fragment, fragment, target_language)
+
+        for key, future in pending.items():
+            translated[key] = future.result()
+            self._cache_put(key, translated[key])
+
+        return "\n\n".join(
+            translated.get(self._cache_key(fragment, target_language), fragment)
+            for fragment in fragments
+        )
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {"entries": len(self.cache), "hits": self.hits, "misses": self.misses}
+
+_translation_service = None
+_translation_service_lock = threading.Lock()
+
+def get_translation_service() -> TranslationService:
+    """Get the process-wide translation service, creating it on first use"""
+    global _translation_service
+    if _translation_service is None:
+        with _translation_service_lock:
+            if _translation_service is None:
+                _translation_service = TranslationService()
+    return _translation_service
@@ -0,0 +1,94 @@
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import functools
+import os
+import threading
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Document generation is mostly waiting on OpenAI, so it runs on threads.
+# GENERATION_WORKERS drafts run at once and up to GENERATION_QUEUE_SIZE more
+# may wait for a free worker before new requests are turned away.
+GENERATION_WORKERS = int(os.getenv("GENERATION_WORKERS", "16"))
+GENERATION_QUEUE_SIZE = int(os.getenv("GENERATION_QUEUE_SIZE", "32"))
+
+class QueueFullError(Exception):
+    """Raised when a worker pool has no free worker and no free queue slot"""
+
+class WorkerPool:
+    """Bounded thread pool with admission control for blocking work.
+
+    Lets async endpoints hand blocking calls to worker threads so the event
+    loop stays free, and rejects new work up front instead of letting an
+    unbounded backlog build up when the pool is saturated.
+    """
+
+    def __init__(self, max_workers: int, queue_size: int, name: str):
+        self.name = name
+        self.max_workers = max_workers
+        self.queue_size = queue_size
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self.slots = threading.BoundedSemaphore(max_workers + queue_size)
+        self.lock = threading.Lock()
+        self.running = 0
+        self.waiting = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def _call(self, func, *args, **kwargs):
+        with self.lock:
+            self.waiting -= 1
+            self.running += 1
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            with self.lock:
+                self.failed += 1
+            raise
+        else:
+            with self.lock:
+                self.completed += 1
+            return result
+        finally:
+            with self.lock:
+                self.running -= 1
+            # Released by the worker, so a cancelled request keeps its slot until the work really ends
+            self.slots.release()
+
+    async def run(self, func, *args, **kwargs):
+        """Run func on a worker thread, or raise QueueFullError if the pool is saturated"""
+        if not self.slots.acquire(blocking=False):
+            with self.lock:
+                self.rejected += 1
+            raise QueueFullError(f"{self.name} pool is full")
+        with self.lock:
+            self.waiting += 1
+        try:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(
+                self.executor,
+                functools.partial(self._call, func, *args, **kwargs)
+            )
+        except Exception:
+            with self.lock:
+                self.waiting -= 1
+            self.slots.release()
+            raise
+        return await future
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "workers": self.max_workers,
+                "queue_size": self.queue_size,
+                "running": self.running,
+                "waiting": self.waiting,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected
+            }
+
+generation_pool = WorkerPool(GENERATION_WORKERS, GENERATION_QUEUE_SIZE, "generation")
@@ -3,6 +3,7 @@ package routes
 import (
 	"net/http"
 	"path/filepath"
+	"strings"
 	"sync"
 	"time"
 
@@ -25,6 +26,28 @@ var documentStorage = &DocStorage{
 	docs: make(map[string]interface{}),
 }
 
+// notModified reports whether the request's conditional headers match the
+// document version given by etag and modified. If-None-Match takes
+// precedence over If-Modified-Since, as in RFC 9110.
+func notModified(r *http.Request, etag string, modified time.Time) bool {
+	if match := r.Header.Get("If-None-Match"); match != "" {
+		for _, tag := range strings.Split(match, ",") {
+			tag = strings.TrimPrefix(strings.TrimSpace(tag), "W/")
+			if tag == etag || tag == "*" {
+				return true
+			}
+		}
+		return false
+	}
+	if since := r.Header.Get("If-Modified-Since"); since != "" {
+		if t, err := http.ParseTime(since); err == nil {
+			// HTTP dates have whole seconds
+			return !modified.Truncate(time.Second).After(t)
+		}
+	}
+	return false
+}
+
 func SetupDocumentRoutes(router *gin.Engine, documentService *services.DocumentParserService) {
 	// GET endpoint to retrieve parsed document by ID
 	router.GET("/api/documents/:id", func(c *gin.Context) {
@@ -133,9 +156,24 @@ func SetupDocumentRoutes(router *gin.Engine, documentService *services.DocumentP
 			return
 		}
 
-		doc := documentStorage.docs[documentStorage.lastDocID]
+		docID := documentStorage.lastDocID
+		docTime := documentStorage.lastDocTime
+		doc := documentStorage.docs[docID]
 		documentStorage.RUnlock()
 
+		// Each upload gets a new ID, so the ID identifies this version of the
+		// text; clients that already hold it get a 304 without the body
+		etag := `"` + docID + `"`
+		lastModified := docTime.UTC().Format(http.TimeFormat)
+		if notModified(c.Request, etag, docTime) {
+			c.Header("ETag", etag)
+			c.Header("Last-Modified", lastModified)
+			c.Status(http.StatusNotModified)
+			return
+		}
+		c.Header("ETag", etag)
+		c.Header("Last-Modified", lastModified)
+
 		// Extract document and text from the stored object
 		if docMap, ok := doc.(gin.H); ok {
 			if document, ok := docMap["document"]; ok {
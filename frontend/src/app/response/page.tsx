@@ -51,8 +51,11 @@ export default function ResponsePage() {
   useEffect(() => {
     const fetchResponse = async () => {
       try {
+        // Set by the search page; without it there is no query to show
+        const sessionId = sessionStorage.getItem("sessionId");
+        if (!sessionId) return;
         const response = await fetch(
-          "http://localhost:9000/api/process-backend"
+          `http://localhost:9000/api/process-backend?session_id=${encodeURIComponent(sessionId)}`
         );
         const data = await response.json();
         setResponse(data);
@@ -139,8 +142,13 @@ export default function ResponsePage() {
 
     try {
       // Configure fetch to handle binary data (PDF)
+      const sessionId = sessionStorage.getItem("sessionId");
+      if (!sessionId) {
+        setPdfError("Search again to generate a petition for your query");
+        return;
+      }
       const response = await fetch(
-        "http://localhost:8001/generate_from_backend",
+        `http://localhost:8001/generate_from_backend?session_id=${encodeURIComponent(sessionId)}`,
         {
           method: "GET",
           headers: {
@@ -108,10 +108,13 @@ export default function SearchPage() {
         }),
       });
       if (!saveRes.ok) throw new Error("Failed to save query");
+      const { session_id: sessionId } = await saveRes.json();
+      // The response page asks for this query by its session id
+      sessionStorage.setItem("sessionId", sessionId);
 
       // 2. Get the processed result
       const processRes = await fetch(
-        "http://localhost:9000/api/process-backend"
+        `http://localhost:9000/api/process-backend?session_id=${encodeURIComponent(sessionId)}`
       );
       if (!processRes.ok) throw new Error("Failed to process query");
 
@@ -174,6 +177,8 @@ export default function SearchPage() {
         };
         // Store the parsed document data
         localStorage.setItem("parsedDocument", JSON.stringify(formattedData));
+        // A new document gets a new analysis session on the response page
+        sessionStorage.removeItem("analysisSessionId");
         setToast({
           message: "Document parsed successfully",
           type: "success",
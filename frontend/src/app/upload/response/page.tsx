@@ -22,8 +22,28 @@ export default function UploadResponsePage() {
   useEffect(() => {
     const fetchResponse = async () => {
       try {
-        const response = await fetch('http://localhost:9001/api/analyze');
+        // The first visit after an upload starts an analysis session; a reload
+        // asks for the same analysis again by its id
+        const sessionId = sessionStorage.getItem('analysisSessionId');
+        let response;
+        if (sessionId) {
+          response = await fetch(`http://localhost:9001/api/analyze?session_id=${encodeURIComponent(sessionId)}`);
+        } else {
+          const authState = JSON.parse(localStorage.getItem('authState') || '{}');
+          const user = authState.user || {};
+          response = await fetch('http://localhost:9001/api/analyze', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({
+              query: 'Summarize this document',
+              userDetails: { name: user.name || '', phone: user.phone || '', address: user.address || '' },
+            }),
+          });
+        }
         const data = await response.json();
+        if (data.session_id) {
+          sessionStorage.setItem('analysisSessionId', data.session_id);
+        }
         setResponse(data);
       } catch (error) {
         console.error('Error fetching response:', error);